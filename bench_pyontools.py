@@ -0,0 +1,220 @@
+"""
+bench_pyontools.py
+
+Benchmarks for the pyontools encode, decode and convert hot paths.
+
+Each benchmark runs one operation over a synthetic corpus and reports throughput
+(MB/s of PYON text and items/s, where an item is a document or a CSV cell) and
+the peak memory allocated during one run, measured with tracemalloc in a
+separate pass so tracing does not distort the timings. The json module and
+ast.literal_eval / repr run over the same corpora as baselines.
+
+Usage:
+    python bench_pyontools.py                      # all corpora, default scale
+    python bench_pyontools.py --scale 0.1          # quick smoke run
+    python bench_pyontools.py --corpus deep --corpus csv --output bench_output.txt
+"""
+
+import argparse
+import ast
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyontools import (
+    normalize_pyon,
+    pyon_decode,
+    pyon_decode_row,
+    pyon_encode,
+    pyon_to_json,
+    remove_spaces,
+)
+
+
+# Synthetic corpora. Each builder returns a list of Python objects, all of which
+# are also JSON-representable except where noted, so the json baselines can run.
+
+def _flat(n: int, rng: random.Random) -> List[Any]:
+    return [{f'field{j}': rng.randint(0, 10**6) for j in range(10)} for _ in range(n)]
+
+
+def _deep(n: int, rng: random.Random) -> List[Any]:
+    docs = []
+    for _ in range(n):
+        node: Any = rng.random()
+        for depth in range(30):
+            node = {'depth': depth, 'child': node} if depth % 2 else [depth, node]
+        docs.append(node)
+    return docs
+
+
+def _wide(n: int, rng: random.Random) -> List[Any]:
+    return [{f'k{j}': [j, str(j), j * 0.5] for j in range(500)} for _ in range(max(1, n // 50))]
+
+
+def _strings(n: int, rng: random.Random) -> List[Any]:
+    words = ['alpha', "it's", 'say "hi"', 'tab\there', 'line\nbreak', 'ünïcode', 'back\\slash', 'x' * 40]
+    return [[' '.join(rng.choice(words) for _ in range(6)) for _ in range(20)] for _ in range(n)]
+
+
+def _numbers(n: int, rng: random.Random) -> List[Any]:
+    return [[rng.choice((rng.randint(-10**9, 10**9), rng.uniform(-1e6, 1e6))) for _ in range(50)]
+            for _ in range(n)]
+
+
+CORPORA: Dict[str, Callable[[int, random.Random], List[Any]]] = {
+    'flat': _flat,
+    'deep': _deep,
+    'wide': _wide,
+    'strings': _strings,
+    'numbers': _numbers,
+}
+
+
+def _csv_rows(n: int, rng: random.Random) -> List[List[str]]:
+    """ CSV-style rows mixing plain text cells with PYON-encoded cells. """
+    rows = []
+    for i in range(n):
+        rows.append([
+            str(i),
+            rng.choice(['ballot', 'precinct', 'contest']),
+            repr({'votes': rng.randint(0, 500), 'ok': rng.random() > 0.1}),
+            repr([rng.randint(0, 9) for _ in range(5)]),
+            repr((rng.random(), None)),
+            'plain text',
+        ])
+    return rows
+
+
+# Measurement
+
+def _measure(func: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """
+    Time func and measure the peak memory it allocates.
+
+    Returns:
+        Tuple[float, int]: best wall time in seconds over repeat runs, and the
+        tracemalloc peak in bytes of one further traced run.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def _cases(name: str, docs: List[Any]) -> List[Tuple[str, Callable[[], Any], int, int]]:
+    """
+    Build (label, func, text_bytes, items) benchmark cases for one corpus.
+    """
+    texts = [pyon_encode(d) for d in docs]
+    compact_texts = [pyon_encode(d, compact=True) for d in docs]
+    json_texts = [json.dumps(d) for d in docs]
+    size = sum(len(t.encode('utf-8')) for t in texts)
+    count = len(docs)
+    return [
+        ('pyon_encode', lambda: [pyon_encode(d) for d in docs], size, count),
+        ('pyon_encode(compact)', lambda: [pyon_encode(d, compact=True) for d in docs], size, count),
+        ('pyon_decode', lambda: [pyon_decode(t) for t in texts], size, count),
+        ('pyon_decode(compact)', lambda: [pyon_decode(t) for t in compact_texts], size, count),
+        ('remove_spaces', lambda: [remove_spaces(t) for t in texts], size, count),
+        ('pyon_to_json', lambda: [pyon_to_json(d) for d in docs], size, count),
+        ('normalize_pyon', lambda: [normalize_pyon(t) for t in texts], size, count),
+        ('baseline repr', lambda: [repr(d) for d in docs], size, count),
+        ('baseline json.dumps', lambda: [json.dumps(d) for d in docs], size, count),
+        ('baseline json.loads', lambda: [json.loads(t) for t in json_texts], size, count),
+        ('baseline ast.literal_eval', lambda: [ast.literal_eval(t) for t in texts], size, count),
+    ]
+
+
+def _csv_cases(rows: List[List[str]]) -> List[Tuple[str, Callable[[], Any], int, int]]:
+    size = sum(len(cell.encode('utf-8')) for row in rows for cell in row)
+    cells = sum(len(row) for row in rows)
+    columns = [2, 3, 4]
+
+    def literal_eval_cells():
+        for row in rows:
+            [ast.literal_eval(row[c]) for c in columns]
+
+    return [
+        ('pyon_decode_row', lambda: [pyon_decode_row(row) for row in rows], size, cells),
+        ('baseline ast.literal_eval', literal_eval_cells, size, cells),
+    ]
+
+
+def run(corpora: List[str], scale: float=1.0, repeat: int=3, seed: int=1, out=sys.stdout) -> List[Dict[str, Any]]:
+    """
+    Run the benchmarks and print one line per case.
+
+    Args:
+        corpora: Names from CORPORA, plus 'csv' for row decoding.
+        scale: Multiplier for the number of documents or rows per corpus.
+        repeat: Timed runs per case; the best is reported.
+        seed: Seed for the corpus generators.
+        out: Text stream for the report.
+
+    Returns:
+        List[Dict[str, Any]]: one record per case with corpus, case, seconds,
+        mb_per_s, items_per_s and peak_kb.
+    """
+    results = []
+    n = max(1, int(2000 * scale))
+    print(f"python {sys.version.split()[0]}, scale {scale}, best of {repeat}", file=out)
+    print(f"{'corpus':<8} {'case':<26} {'MB/s':>9} {'items/s':>12} {'peak KB':>10}", file=out)
+    for name in corpora:
+        rng = random.Random(seed)
+        if name == 'csv':
+            cases = _csv_cases(_csv_rows(n, rng))
+        else:
+            cases = _cases(name, CORPORA[name](n, rng))
+        for label, func, size, items in cases:
+            seconds, peak = _measure(func, repeat)
+            seconds = max(seconds, 1e-9)
+            record = {
+                'corpus': name,
+                'case': label,
+                'seconds': seconds,
+                'mb_per_s': size / seconds / 1e6,
+                'items_per_s': items / seconds,
+                'peak_kb': peak / 1024,
+            }
+            results.append(record)
+            print(f"{name:<8} {label:<26} {record['mb_per_s']:>9.2f} {record['items_per_s']:>12,.0f} "
+                  f"{record['peak_kb']:>10,.0f}", file=out)
+            out.flush()
+    return results
+
+
+def main(argv: Optional[List[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pyontools encode/decode/convert paths.")
+    parser.add_argument('--corpus', action='append', choices=[*CORPORA, 'csv'],
+                        help="corpus to run (repeatable); default is all")
+    parser.add_argument('--scale', type=float, default=1.0, help="corpus size multiplier (default 1.0)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case (default 3)")
+    parser.add_argument('--seed', type=int, default=1, help="corpus random seed (default 1)")
+    parser.add_argument('--output', help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    corpora = args.corpus or [*CORPORA, 'csv']
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            results = run(corpora, args.scale, args.repeat, args.seed, out=fp)
+        with open(args.output, encoding='utf-8') as fp:
+            sys.stdout.write(fp.read())
+    else:
+        results = run(corpora, args.scale, args.repeat, args.seed)
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
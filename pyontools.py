@@ -1,306 +1,3009 @@
-"""
-pyontools.py
-
-PYONTools: A lightweight module for encoding and decoding Python Object Notation (PYON).
-
-PYON (Python Object Notation) mirrors Python's `repr()` output, making it a simple, 
-human-readable format for serializing Python-native objects such as `dict`, `list`, 
-`tuple`, `set`, and more. PYONTools provides safe methods for encoding, decoding, 
-and compacting PYON data, particularly useful for CSV workflows.
-
-Core Features:
-- pyon_encode: Generate PYON representations using Python's `repr()` output.
-- pyon_decode: Safely reconstruct PYON-encoded strings into Python objects.
-- pyon_decode_row: Decode entire CSV rows containing PYON-encoded objects.
-- remove_spaces: Produce a compact PYON representation by removing unnecessary spaces.
-- pyon_to_json: Convert PYON-compatible objects into JSON format for external compatibility.
-
-Example Use Cases:
-- Serializing arbitrary objects for storage without restrictions of JSON
-- Storing Python-native objects in CSV files with `csv.writer`.
-- Reading and decoding structured data using `csv.reader`.
-- Compacting PYON strings for optimized storage.
-- Ensuring safe deserialization of string representations.
-
-Key Differences Between PYON and JSON:
-- PYON supports non-string dictionary keys, sets, and tuples, which JSON does not.
-- PYON is human-readable and mirrors native Python syntax (`repr()`).
-- JSON ensures cross-language compatibility, while PYON is Python-specific, but
-is easily converted to JSON (although losing flexibility).
-
-Examples:
-
-# JSON fails to handle these cases:
-data = {
-    1: "integer key",          # Non-string key
-    "set": {1, 2, 3},          # Set type
-    "tuple": (1, 2, 3),        # Tuple type
-    "nested": {"a": True, "b": [1, 2, 3]}
-}
-
-# PYON representation:
-pyon_str = repr(data)
-print(pyon_str)
-# Output: {1: 'integer key', 'set': {1, 2, 3}, 'tuple': (1, 2, 3), 'nested': {'a': True, 'b': [1, 2, 3]}}
-
-# Safely decode PYON back to a Python object:
-import ast
-decoded = ast.literal_eval(pyon_str)
-print(decoded)
-# Output: {1: 'integer key', 'set': {1, 2, 3}, 'tuple': (1, 2, 3), 'nested': {'a': True, 'b': [1, 2, 3]}}
-
-# JSON limitations:
-import json
-try:
-    json_str = json.dumps(data)  # This will raise a TypeError due to unsupported types
-except TypeError as e:
-    print(f"JSON Error: {e}")
-# Output: JSON Error: keys must be str, int, float, bool or None, not int
-
-License: MIT License
-Author: Ray Lutz
-Version: 0.1.0
-"""
-
-import ast
-import re
-import pprint
-from typing import Any, List #, Union
-
-
-__all__ = [
-    "sort_dict_keys", 
-    "normalize_pyon", 
-    "pyon_encode", 
-    "pyon_decode", 
-    "remove_spaces", 
-    "pyon_to_json", 
-    "pyon_decode_row",
-    "dumps",
-    "loads",
-]
-
-
-# Core PYON Methods
-def pyon_encode(obj: Any, indent: int=0, width=160) -> str:
-    """
-    Encode a Python object into its __repr__ representation (PYON format).
-    Mirrors the behavior of csv.writer() for embedded structures.
-
-    Args:
-        obj: The Python object to encode.
-        indent: if nonzero, create indented "pretty printed" form using multiple lines.
-        width: if indent is nonzero, then limit width to this number of characters.
-
-    Returns:
-        str: __repr__ representation of the object.
-    """
-    if indent:
-        return pprint.pformat(obj, indent=indent, width=width, compact=False)
-    
-    return repr(obj)
-
-
-def pyon_decode(pyon_str: str) -> Any:
-    """
-    Safely decode a PYON-encoded string into its original Python object.
-
-    Args:
-        pyon_str: The string representation to decode.
-
-    Returns:
-        Any: The reconstructed Python object.
-
-    Raises:
-        ValueError: If decoding fails.
-    """
-    if not pyon_str:
-        return pyon_str
-    
-    try:
-        return ast.literal_eval(pyon_str)
-    except (SyntaxError, ValueError) as e:
-        raise ValueError(f"Invalid PYON data: {e}")
-
-
-# support aliases for compatibility with existing code.
-
-dumps = pyon_encode
-loads = pyon_decode
-
-
-# Utility for Compact Representation
-def remove_spaces(pyon_str: str) -> str:
-    """
-    Remove spaces from a PYON string, ignoring spaces inside quotes.
-
-    Args:
-        pyon_str: The input string in PYON format.
-
-    Returns:
-        str: The string with spaces removed outside quoted substrings.
-    """
-    return re.sub(r" (?=(?:[^']*'[^']*')*[^']*$)", "", pyon_str)
-
-
-# PYON to JSON Converter
-def pyon_to_json(obj: Any) -> str:
-    """
-    Convert a PYON-compatible object to JSON format.
-    Raises an error for unsupported non-JSON types.
-    Attempts to get maximum conversion to equivalent types.
-
-    Args:
-        obj: The PYON object to convert.
-
-    Returns:
-        str: JSON-formatted string.
-
-    Raises:
-        TypeError: If unsupported types are encountered.
-    """
-    import json
-    import types
-
-    def convert(value):
-        if isinstance(value, (str, int, float, bool, type(None))):
-            return value
-        elif isinstance(value, dict):
-            return {str(k): convert(v) for k, v in value.items()}  # Ensure string keys
-        elif isinstance(value, list):
-            return [convert(v) for v in value]
-        elif isinstance(value, tuple):
-            return [convert(v) for v in value]  # Convert tuple to list
-        elif isinstance(value, (types.FunctionType, type)):
-            return f"{value.__module__}.{value.__qualname__}"
-        else:
-            raise TypeError(f"Unsupported type: {type(value)}")
-
-    return json.dumps(convert(obj), separators=(",", ":"))
-    
-    
-def simple_pyon_to_json(pyon_str: str) -> str: # JSON str
-    """
-    Convert a PYON-compatible object to JSON format.
-    Raises an error for unsupported non-JSON types.
-    Simple conversion to use when the pyon has no non-JSONable objects.
-    
-    Note: This does not handle any extensions, such as trailing commas, integer or tuple keys, etc.
-            
-    Perfect for conversion of indirect columns for SQL processing that requires JSON.
-
-    Args:
-        obj: The PYON object to convert.
-
-    Returns:
-        str: JSON-formatted string.
-
-    Raises:
-        TypeError: If unsupported types are encountered.
-    """
-    
-    json_str = re.sub(r"'", '"', pyon_str)
-    return json_str
-    
-    
-    # import json
-    # return json.dumps(pyon_decode(pyon_str), separators=(",", ":"))
-    
-    
-
-
-def pyon_decode_row(row: List[str]) -> List[Any]:
-    """
-    Decode an entire CSV row with PYON-encoded strings. Identifies objects when strings start/end with {}, [], ()
-
-    Args:
-        row: A list of strings (as delivered by csv.reader).
-
-    Returns:
-        A list where PYON strings are decoded into Python objects, and other strings are left as-is.
-    """
-    decoded_row = []
-    for cell in row:
-        if isinstance(cell, str) and (
-            (cell.startswith("{") and cell.endswith("}")) or
-            (cell.startswith("[") and cell.endswith("]")) or
-            (cell.startswith("(") and cell.endswith(")"))
-        ):
-            try:
-                decoded_row.append(pyon_decode(cell))
-            except ValueError:
-                decoded_row.append(cell)  # Leave invalid PYON as string
-        else:
-            decoded_row.append(cell)  # Leave non-PYON strings as-is
-    return decoded_row
-    
-    
-def sort_dict_keys(obj: Any) -> Any:
-    """
-    Recursively sort dictionary keys in a Python object.
-
-    Args:
-        obj: The input object, which can be a dictionary, list, tuple, or other types.
-
-    Returns:
-        The input object with dictionary keys sorted recursively.
-    """
-    if isinstance(obj, dict):
-        # Sort keys and apply sorting to values
-        return {k: sort_dict_keys(v) for k, v in sorted(obj.items())}
-    elif isinstance(obj, list):
-        # Apply sorting recursively to list elements
-        return [sort_dict_keys(item) for item in obj]
-    elif isinstance(obj, tuple):
-        # Apply sorting recursively to tuple elements
-        return tuple(sort_dict_keys(item) for item in obj)
-    else:
-        # Return object as-is if not a container
-        return obj
-
-
-def normalize_pyon(pyon_str: str) -> str:
-    """
-    Normalize a PYON string by decoding it, sorting dictionary keys recursively, 
-    and re-encoding it into a consistent PYON format.
-
-    Args:
-        pyon_str: A string containing PYON-encoded data.
-
-    Returns:
-        str: A normalized PYON string with sorted dictionary keys.
-
-    Notes:
-        - If the input string cannot be decoded as PYON, it is returned unchanged.
-    """
-    try:
-        # Safely decode the PYON string into a Python object
-        pyon_obj = pyon_decode(pyon_str)
-        # Recursively sort dictionary keys
-        normalized_obj = sort_dict_keys(pyon_obj)
-        # Re-encode into a consistent PYON string
-        return pyon_encode(normalized_obj)
-        
-    except (ValueError, SyntaxError):
-        # Return the original string if decoding fails
-        return pyon_str
-
-
-
-# Example of Usage
-if __name__ == "__main__":
-    # Encode and Decode Example
-    data = {"key": True, "list": [1, 2, 3], "nested": {"a": 1, "b": 2}}
-    encoded = pyon_encode(data)
-    print("Encoded PYON:", encoded)
-
-    decoded = pyon_decode(encoded)
-    print("Decoded PYON:", decoded)
-
-    # Remove Spaces Example
-    compact = remove_spaces(encoded)
-    print("Compact PYON:", compact)
-
-    # Convert to JSON Example
-    json_data = pyon_to_json(data)
-    print("JSON Data:", json_data)
+"""
+pyontools.py
+
+PYONTools: A lightweight module for encoding and decoding Python Object Notation (PYON).
+
+PYON (Python Object Notation) mirrors Python's `repr()` output, making it a simple, 
+human-readable format for serializing Python-native objects such as `dict`, `list`, 
+`tuple`, `set`, and more. PYONTools provides safe methods for encoding, decoding, 
+and compacting PYON data, particularly useful for CSV workflows.
+
+Core Features:
+- pyon_encode: Generate PYON representations using Python's `repr()` output.
+- pyon_decode: Safely reconstruct PYON-encoded strings into Python objects.
+- pyon_decode_row: Decode entire CSV rows containing PYON-encoded objects.
+- remove_spaces: Produce a compact PYON representation by removing unnecessary spaces.
+- pyon_to_json: Convert PYON-compatible objects into JSON format for external compatibility.
+- pyon_str_to_json: Convert PYON text to JSON text without decoding it.
+- json_to_pyon: Convert JSON text to canonical PYON text.
+- enable_stats: Opt-in call, size, timing and fallback counters for the functions above.
+
+Example Use Cases:
+- Serializing arbitrary objects for storage without restrictions of JSON
+- Storing Python-native objects in CSV files with `csv.writer`.
+- Reading and decoding structured data using `csv.reader`.
+- Compacting PYON strings for optimized storage.
+- Ensuring safe deserialization of string representations.
+
+Key Differences Between PYON and JSON:
+- PYON supports non-string dictionary keys, sets, and tuples, which JSON does not.
+- PYON is human-readable and mirrors native Python syntax (`repr()`).
+- JSON ensures cross-language compatibility, while PYON is Python-specific, but
+is easily converted to JSON (although losing flexibility).
+
+Examples:
+
+# JSON fails to handle these cases:
+data = {
+    1: "integer key",          # Non-string key
+    "set": {1, 2, 3},          # Set type
+    "tuple": (1, 2, 3),        # Tuple type
+    "nested": {"a": True, "b": [1, 2, 3]}
+}
+
+# PYON representation:
+pyon_str = repr(data)
+print(pyon_str)
+# Output: {1: 'integer key', 'set': {1, 2, 3}, 'tuple': (1, 2, 3), 'nested': {'a': True, 'b': [1, 2, 3]}}
+
+# Safely decode PYON back to a Python object:
+import ast
+decoded = ast.literal_eval(pyon_str)
+print(decoded)
+# Output: {1: 'integer key', 'set': {1, 2, 3}, 'tuple': (1, 2, 3), 'nested': {'a': True, 'b': [1, 2, 3]}}
+
+# JSON limitations:
+import json
+try:
+    json_str = json.dumps(data)  # This will raise a TypeError due to unsupported types
+except TypeError as e:
+    print(f"JSON Error: {e}")
+# Output: JSON Error: keys must be str, int, float, bool or None, not int
+
+License: MIT License
+Author: Ray Lutz
+Version: 0.1.0
+"""
+
+import codecs
+import collections
+import functools
+import itertools
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import types
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, TextIO, Union
+
+# ast, pprint, hashlib, threading and concurrent.futures are imported where they are
+# used, so that importing pyontools to encode or decode small values stays cheap:
+# ast is only needed for the literal_eval fallback, the others by optional features.
+if TYPE_CHECKING:
+    import concurrent.futures
+
+
+__all__ = [
+    "sort_dict_keys", 
+    "normalize_pyon", 
+    "normalize_pyon_many",
+    "pyon_hash",
+    "pyon_hash_str",
+    "pyon_encode", 
+    "pyon_decode", 
+    "PyonDecodeError",
+    "PyonStats",
+    "enable_stats",
+    "disable_stats",
+    "remove_spaces", 
+    "pyon_to_json", 
+    "PyonJsonEncoder",
+    "pyon_str_to_json",
+    "json_to_pyon",
+    "pyon_decode_row",
+    "pyon_decode_rows",
+    "pyon_decode_rows_parallel",
+    "PyonDecodeCache",
+    "iterencode",
+    "pyon_dump",
+    "iterdecode",
+    "pyon_load",
+    "ndpyon_dump",
+    "ndpyon_load",
+    "ndpyon_build_index",
+    "ndpyon_read_record",
+    "dumps",
+    "loads",
+    "dump",
+    "load",
+]
+
+
+# Errors
+
+class PyonDecodeError(ValueError):
+    """
+    Raised when text is not valid PYON, with the location of the problem.
+
+    Attributes:
+        msg: the error message, without the location.
+        doc: the text being decoded (for a stream, None), or None.
+        pos: character offset of the error in the text, or None if not known.
+        lineno: 1-based line of pos, or None.
+        colno: 1-based column of pos, or None.
+        row_index: index of the row, when decoding CSV rows (None otherwise).
+        col_index: index of the cell in its row, when decoding CSV rows (None otherwise).
+    """
+
+    def __init__(self, msg: str, doc: Optional[str]=None, pos: Optional[int]=None,
+                 lineno: Optional[int]=None, colno: Optional[int]=None,
+                 row_index: Optional[int]=None, col_index: Optional[int]=None):
+        if pos is not None and lineno is None and isinstance(doc, str):
+            lineno = doc.count('\n', 0, pos) + 1
+            colno = pos - doc.rfind('\n', 0, pos)
+        self.msg = msg
+        self.doc = doc
+        self.pos = pos
+        self.lineno = lineno
+        self.colno = colno
+        self.row_index = row_index
+        self.col_index = col_index
+        where = ''
+        if lineno is not None:
+            where += f": line {lineno} column {colno} (char {pos})"
+        elif pos is not None:
+            where += f": char {pos}"
+        if row_index is not None or col_index is not None:
+            where += f" in row {row_index}, cell {col_index}"
+        super().__init__(f"Invalid PYON data: {msg}{where}")
+
+    def __reduce__(self):
+        return (self.__class__, (self.msg, self.doc, self.pos, self.lineno, self.colno,
+                                 self.row_index, self.col_index))
+
+
+def _syntax_error_pos(text: str, e: SyntaxError) -> Optional[int]:
+    """ Offset in text of the error ast.literal_eval reported, which strips leading blanks. """
+    if not isinstance(text, str) or e.lineno is None or not e.offset:
+        return None
+    lead = len(text) - len(text.lstrip(' \t'))
+    line_start = lead
+    for _ in range(e.lineno - 1):
+        line_start = text.find('\n', line_start) + 1
+        if not line_start:
+            return None
+    return min(line_start + e.offset - 1, len(text))
+
+
+# Instrumentation
+
+# The PyonStats receiving measurements, or None. Instrumented functions test this
+# one global and otherwise run unmeasured, so disabled stats cost next to nothing.
+_stats = None
+
+
+class PyonStats:
+    """
+    Opt-in counters for the PYON decode, encode and convert functions.
+
+    Once installed with enable_stats(), every call of pyon_decode, pyon_decode_row,
+    pyon_encode, pyon_to_json, pyon_str_to_json and json_to_pyon is counted, with the
+    size in UTF-8 bytes of the text it read or produced, the time spent and whether
+    it raised.
+    Calls are counted at every level, so a pyon_decode_row call also counts the
+    pyon_decode calls for its cells. Events that explain slow or lossy results
+    are counted too:
+
+        pyon_decode.literal_eval      decoded by the ast.literal_eval fallback
+        pyon_decode_row.kept_string   a cell that looked like PYON but did not decode
+        cache.hits, cache.misses      PyonDecodeCache lookups
+
+    Counts are per process: work done in pyon_decode_rows_parallel workers or
+    normalize_pyon_many worker processes is not seen.
+
+    Args:
+        hook: optional callable hook(name, size, seconds, error) called after every
+            measured call; size is in UTF-8 bytes, and error is the exception raised,
+            or None.
+        timing: if False, do not read the clock (seconds are reported as 0.0).
+    """
+
+    def __init__(self, hook: Optional[Callable[[str, int, float, Optional[BaseException]], None]]=None,
+                 timing: bool=True):
+        self.hook = hook
+        self.timing = timing
+        import threading
+        self._lock = threading.Lock()
+        self._calls = collections.Counter()
+        self._bytes = collections.Counter()
+        self._seconds = collections.Counter()
+        self._failures = collections.Counter()
+        self._events = collections.Counter()
+
+    def measure(self, name: str, text: Any, func: Callable, *args) -> Any:
+        """
+        Call func(*args) and record it under name.
+
+        Args:
+            name: the operation name.
+            text: the input text whose UTF-8 size is recorded, or None to record the
+                size of the result (for encoders).
+            func: the function to call.
+
+        Returns:
+            Any: what func returned.
+        """
+        clock = time.perf_counter if self.timing else _no_clock
+        start = clock()
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self.record(name, _text_size(text), clock() - start, e)
+            raise
+        self.record(name, _text_size(result if text is None else text), clock() - start)
+        return result
+
+    def record(self, name: str, size: int=0, seconds: float=0.0, error: Optional[BaseException]=None) -> None:
+        """ Record one call of name, and pass it to the hook. """
+        with self._lock:
+            self._calls[name] += 1
+            self._bytes[name] += size
+            self._seconds[name] += seconds
+            if error is not None:
+                self._failures[name] += 1
+        if self.hook is not None:
+            self.hook(name, size, seconds, error)
+
+    def count(self, event: str, n: int=1) -> None:
+        """ Add n to the counter for event. """
+        with self._lock:
+            self._events[event] += n
+
+    def reset(self) -> None:
+        """ Set all counters back to zero. """
+        with self._lock:
+            for counter in (self._calls, self._bytes, self._seconds, self._failures, self._events):
+                counter.clear()
+
+    def as_dict(self) -> dict:
+        """
+        Flat snapshot of the counters, for a metrics pipeline.
+
+        Returns:
+            dict: '<name>.calls', '<name>.bytes', '<name>.seconds' and '<name>.failures'
+            for every measured function that was called, and '<event>' for every event.
+        """
+        with self._lock:
+            result = {}
+            for name in sorted(self._calls):
+                result[f'{name}.calls'] = self._calls[name]
+                result[f'{name}.bytes'] = self._bytes[name]
+                result[f'{name}.seconds'] = self._seconds[name]
+                result[f'{name}.failures'] = self._failures[name]
+            for event in sorted(self._events):
+                result[event] = self._events[event]
+            return result
+
+
+def _no_clock() -> float:
+    return 0.0
+
+
+def _text_size(text: Any) -> int:
+    """ UTF-8 size of a str, a row of cells or a bytes-like buffer; 0 for anything else. """
+    if isinstance(text, str):
+        return _utf8_size(text)
+    if isinstance(text, list):
+        return sum(_utf8_size(cell) for cell in text if isinstance(cell, str))
+    try:
+        return memoryview(text).nbytes
+    except TypeError:
+        return 0
+
+
+def _utf8_size(s: str) -> int:
+    """ Number of bytes s takes as UTF-8, without encoding it when it is ASCII. """
+    if s.isascii():
+        return len(s)
+    return len(s.encode('utf-8', 'surrogatepass'))
+
+
+def enable_stats(stats: Optional[PyonStats]=None, hook=None) -> PyonStats:
+    """
+    Start recording calls of the PYON functions.
+
+    Args:
+        stats: the PyonStats to record into; by default a new one.
+        hook: for a new PyonStats, a hook as for PyonStats().
+
+    Returns:
+        PyonStats: the installed stats object, whose as_dict() gives the counters.
+    """
+    global _stats
+    if stats is None:
+        stats = PyonStats(hook=hook)
+    _stats = stats
+    return stats
+
+
+def disable_stats() -> Optional[PyonStats]:
+    """
+    Stop recording calls of the PYON functions.
+
+    Returns:
+        Optional[PyonStats]: the stats object that was installed, or None.
+    """
+    global _stats
+    stats, _stats = _stats, None
+    return stats
+
+
+# Core PYON Methods
+def pyon_encode(obj: Any, indent: int=0, width=160, compact: bool=False,
+                sort_keys: bool=False, canonical: bool=False) -> str:
+    """
+    Encode a Python object into its __repr__ representation (PYON format).
+    Mirrors the behavior of csv.writer() for embedded structures.
+
+    Args:
+        obj: The Python object to encode.
+        indent: if nonzero, create indented "pretty printed" form using multiple lines,
+            laid out exactly as pprint.pformat(obj, indent=indent, width=width) does.
+        width: if indent is nonzero, then limit width to this number of characters.
+        compact: if True (and indent is 0), use ',' and ':' separators without spaces.
+            Same result as remove_spaces(repr(obj)), produced in one walk of the object.
+        sort_keys: if True, write dict items in sorted key order, using the total order of
+            sort_dict_keys(). Same result as encoding sort_dict_keys(obj), without making
+            the sorted copy. (Indented output is otherwise sorted as pprint sorts it, which
+            orders keys of types that do not compare by id().)
+        canonical: like sort_keys, and also sort set and frozenset items, so that equal
+            values always encode to the same text.
+
+    Returns:
+        str: __repr__ representation of the object.
+
+    Raises:
+        ValueError: If indent is combined with sort_keys or canonical and obj holds a
+            type that pprint lays out itself (such as OrderedDict or a dataclass).
+    """
+    if _stats is not None:
+        return _stats.measure('pyon_encode', None, _pyon_encode, obj, indent, width, compact, sort_keys, canonical)
+    return _pyon_encode(obj, indent, width, compact, sort_keys, canonical)
+
+
+def _pyon_encode(obj: Any, indent: int, width: int, compact: bool, sort_keys: bool, canonical: bool) -> str:
+    """ pyon_encode() without instrumentation. """
+    if indent:
+        return _pformat(obj, indent, width, sort_keys or canonical, canonical)
+
+    if compact or sort_keys or canonical:
+        return ''.join(iterencode(obj, compact=compact, chunk_size=sys.maxsize,
+                                  sort_keys=sort_keys, canonical=canonical))
+
+    return repr(obj)
+
+
+def pyon_decode(pyon_str: str, use_ast: bool=False) -> Any:
+    """
+    Safely decode a PYON-encoded string into its original Python object.
+
+    Strings that are plain JSON (double quotes, no true/false/null) are decoded by
+    the C json scanner. Everything else goes through a single-pass PYON scanner
+    that builds dicts, lists, tuples and sets directly. Literal forms outside the
+    scanner's grammar (bytes, complex or hex numbers, string prefixes, etc.) are
+    handed to ast.literal_eval, so exactly the same inputs are accepted either way.
+
+    A bytes-like buffer of UTF-8 text (bytes, bytearray, memoryview, mmap) is also
+    accepted. Large buffers are decoded in chunks, item by item, so no str copy of
+    the whole document is made. The buffer is never modified; to also drop decoded
+    pages of a read-only file mapping from memory, use pyon_load(mm, release_pages=True).
+
+    Args:
+        pyon_str: The string representation to decode, or a UTF-8 bytes-like buffer.
+        use_ast: if True, decode with ast.literal_eval only (reference mode).
+
+    Returns:
+        Any: The reconstructed Python object.
+
+    Raises:
+        PyonDecodeError: If decoding fails (a ValueError, giving the error's position).
+    """
+    if _stats is not None:
+        return _stats.measure('pyon_decode', pyon_str, _pyon_decode, pyon_str, use_ast)
+    return _pyon_decode(pyon_str, use_ast)
+
+
+def _pyon_decode(pyon_str: str, use_ast: bool) -> Any:
+    """ pyon_decode() without instrumentation. """
+    if not pyon_str:
+        return pyon_str
+
+    if not isinstance(pyon_str, str):
+        try:
+            view = memoryview(pyon_str).cast('B')
+        except TypeError:
+            pass        # not a buffer; ast.literal_eval reports what it is
+        else:
+            if view.nbytes > _BUFFER_CHUNK_SIZE and not use_ast:
+                return pyon_load(pyon_str)
+            pyon_str = str(view, 'utf-8')
+
+    scan_error = None
+    escape_heavy = False
+    if not use_ast:
+        if isinstance(pyon_str, str) and _is_json_subset(pyon_str):
+            try:
+                return _json_decode(pyon_str)
+            except (ValueError, RecursionError):
+                pass
+        # literal_eval's C tokenizer resolves escapes faster than the scanner can
+        escape_heavy = isinstance(pyon_str, str) and _is_escape_heavy(pyon_str)
+        if not escape_heavy:
+            try:
+                return _scan_pyon(pyon_str)
+            except _PyonScanError as e:
+                # outside the scanner grammar, or malformed: let the reference parser decide.
+                scan_error = e
+            except (TypeError, RecursionError):
+                pass
+        if _stats is not None:
+            _stats.count('pyon_decode.literal_eval')
+
+    import ast
+    try:
+        return ast.literal_eval(pyon_str)
+    except (SyntaxError, ValueError) as e:
+        if escape_heavy:
+            # not scanned yet: scan now, to locate the error
+            try:
+                _scan_pyon(pyon_str)
+            except _PyonScanError as scan_e:
+                scan_error = scan_e
+            except (TypeError, RecursionError):
+                pass
+        raise _literal_eval_error(pyon_str, e, scan_error)
+
+
+def _literal_eval_error(pyon_str: str, e: Exception, scan_error: Optional['_PyonScanError']) -> PyonDecodeError:
+    """ PyonDecodeError for an error raised by ast.literal_eval, located as well as possible. """
+    if isinstance(e, SyntaxError):
+        pos = _syntax_error_pos(pyon_str, e)
+        if pos is None and scan_error is not None:
+            pos = scan_error.pos
+        return PyonDecodeError(e.msg, pyon_str, pos)
+    # literal_eval does not say where, but the scanner stopped at the first thing it
+    # rejected, unless that was a literal form it leaves to literal_eval.
+    if scan_error is None or scan_error.msg in (_UNSUPPORTED_NUMBER, _UNSUPPORTED_PREFIX):
+        return PyonDecodeError(str(e), pyon_str)
+    return PyonDecodeError(str(e).split(':', 1)[0], pyon_str, scan_error.pos)
+
+
+def iterencode(obj: Any, compact: bool=False, chunk_size: int=4096,
+               sort_keys: bool=False, canonical: bool=False) -> Iterator[str]:
+    """
+    Encode a Python object to PYON, yielding the text in chunks as the object is walked.
+    Joining the chunks gives the same string as pyon_encode() with the same options.
+
+    Memory use is bounded by the nesting depth and chunk_size, not by the size of
+    the output, so large results can be written out without building one big string.
+
+    Args:
+        obj: The Python object to encode.
+        compact: if True, use ',' and ':' separators without spaces.
+        chunk_size: number of tokens (values and separators) buffered per chunk.
+        sort_keys: if True, write dict items in sorted key order.
+        canonical: if True, also sort set and frozenset items.
+
+    Yields:
+        str: successive pieces of the PYON text.
+    """
+    if compact:
+        return _iterencode(obj, ',', ':', chunk_size, sort_keys or canonical, canonical)
+    return _iterencode(obj, ', ', ': ', chunk_size, sort_keys or canonical, canonical)
+
+
+def pyon_dump(obj: Any, fp: TextIO, compact: bool=False, chunk_size: int=4096,
+              sort_keys: bool=False, canonical: bool=False) -> None:
+    """
+    Encode a Python object to PYON and write it to a text file-like object,
+    chunk by chunk (see iterencode), rather than building the whole string first.
+
+    Args:
+        obj: The Python object to encode.
+        fp: file-like object with a write() method accepting str.
+        compact: if True, use ',' and ':' separators without spaces.
+        chunk_size: number of tokens (values and separators) buffered per write.
+        sort_keys: if True, write dict items in sorted key order.
+        canonical: if True, also sort set and frozenset items.
+    """
+    write = fp.write
+    for chunk in iterencode(obj, compact=compact, chunk_size=chunk_size,
+                            sort_keys=sort_keys, canonical=canonical):
+        write(chunk)
+
+
+def iterdecode(source: Union[str, bytes, TextIO, BinaryIO, Iterable[str]], chunk_size: int=65536,
+               release_pages: bool=False) -> Iterator[Any]:
+    """
+    Incrementally decode a PYON document, yielding each top-level item as soon as
+    it is complete: the elements of a top-level list, tuple or set, or the
+    (key, value) pairs of a top-level dict. A document that is not a container
+    yields its single value.
+
+    Only the item being decoded is held in memory, so a huge top-level list of
+    records can be processed with constant memory. A top-level tuple written
+    without parentheses whose first item is a container, such as '[1], [2]', is
+    only known to be one after that container's items were yielded; it raises
+    PyonDecodeError (pyon_load decodes it).
+
+    Args:
+        source: a file-like object (text, or binary UTF-8), an iterable of str chunks,
+            a str, or a bytes-like buffer of UTF-8 text such as an mmap.
+        chunk_size: size requested per read() from a file, or sliced from a buffer.
+        release_pages: if True and source is an mmap, drop the pages already decoded
+            from the process (MADV_DONTNEED) so resident memory does not grow with the
+            file. Only safe for a read-only mapping of a file (ACCESS_READ, or MAP_SHARED
+            that nothing writes to): it zero-fills anonymous and private mappings and
+            discards unsaved changes of ACCESS_COPY mappings.
+
+    Yields:
+        Any: decoded top-level items.
+
+    Raises:
+        ValueError: If decoding fails.
+    """
+    return _iter_top_items(_PyonStreamReader(_iter_text_chunks(source, chunk_size, release_pages)))
+
+
+def _iter_top_items(reader: '_PyonStreamReader') -> Iterator[Any]:
+    """ reader.iter_items(), rejecting a document that turns out to be a bare tuple. """
+    yield from reader.iter_items()
+    if reader.is_bare_tuple:
+        raise reader._error("a tuple without parentheses cannot be decoded item by item; use pyon_load",
+                            reader._pos)
+
+
+def pyon_load(fp: Union[TextIO, BinaryIO, Iterable[str]], chunk_size: int=65536,
+              release_pages: bool=False) -> Any:
+    """
+    Decode a PYON document from a file-like object (or an iterable of str chunks,
+    or a bytes-like buffer), reading it in chunks rather than as one string (see iterdecode).
+
+    Args:
+        fp: file-like object whose read() returns str or UTF-8 bytes, an iterable of
+            str, or a bytes-like buffer such as an mmap.
+        chunk_size: size requested per read(), or sliced from a buffer.
+        release_pages: if True and fp is an mmap, drop decoded pages from memory;
+            only safe for read-only file mappings (see iterdecode).
+
+    Returns:
+        Any: The reconstructed Python object.
+
+    Raises:
+        PyonDecodeError: If decoding fails (a ValueError, giving the error's position).
+    """
+    reader = _PyonStreamReader(_iter_text_chunks(fp, chunk_size, release_pages))
+    items = reader.iter_items()
+    first = next(items, _NO_ITEM)
+    if first is not _NO_ITEM:
+        items = itertools.chain([first], items)
+    if reader.opener == '[':
+        value = list(items)
+    elif reader.opener == '{':
+        value = set(items) if reader.is_dict is False else dict(items)
+    else:
+        values = list(items)
+        value = tuple(values) if reader.opener == '(' and not reader.is_paren_value else values[0]
+    if reader.is_bare_tuple:
+        return (value, *reader.rest_items())
+    return value
+
+
+# support aliases for compatibility with existing code.
+
+dumps = pyon_encode
+loads = pyon_decode
+dump = pyon_dump
+load = pyon_load
+
+
+# Chunked encoder used by pyon_encode(compact=True), iterencode and pyon_dump
+
+# Exact types whose repr() is emitted as-is: no whitespace outside their quotes.
+_ATOMIC_TYPES = frozenset([str, int, float, bool, type(None), bytes, complex])
+_OPENERS = {list: '[', tuple: '(', set: '{', frozenset: 'frozenset({'}
+_CLOSERS = {list: ']', tuple: ')', set: '}', frozenset: '})'}
+_EMPTY_REPRS = {list: '[]', tuple: '()', set: 'set()', frozenset: 'frozenset()'}
+_CYCLE_REPRS = {list: '[...]', tuple: '(...)'}
+
+
+def _iterencode(obj: Any, item_separator: str, key_separator: str, chunk_size: int,
+                sort_keys: bool=False, sort_sets: bool=False) -> Iterator[str]:
+    """
+    Walk obj once, yielding its repr() with the given separators in chunks of
+    about chunk_size tokens. Only exact builtin containers are walked; anything
+    else is repr()'d (and compacted when the separators carry no spaces).
+    Dict keys and set items are emitted in the total order when asked to.
+    """
+    chunks = []
+    append = chunks.append
+    markers = set()     # ids of containers being encoded, to mirror repr() on cycles
+    compact = ' ' not in item_separator
+
+    def _walk(o):
+        t = type(o)
+        if t is dict:
+            if not o:
+                append('{}')
+                return
+            if id(o) in markers:
+                append('{...}')
+                return
+            markers.add(id(o))
+            append('{')
+            first = True
+            if sort_keys:
+                items = [(k, o[k]) for k in _sorted_total(o)]
+            else:
+                items = o.items()
+            for k, v in items:
+                if first:
+                    first = False
+                else:
+                    append(item_separator)
+                if type(k) in _ATOMIC_TYPES:
+                    append(repr(k))
+                else:
+                    yield from _walk(k)
+                append(key_separator)
+                if type(v) in _ATOMIC_TYPES:
+                    append(repr(v))
+                else:
+                    yield from _walk(v)
+                if len(chunks) >= chunk_size:
+                    yield ''.join(chunks)
+                    chunks.clear()
+            append('}')
+            markers.discard(id(o))
+
+        elif t is list or t is tuple or t is set or t is frozenset:
+            if not o:
+                append(_EMPTY_REPRS[t])
+                return
+            if id(o) in markers:
+                append(_CYCLE_REPRS[t])
+                return
+            markers.add(id(o))
+            append(_OPENERS[t])
+            first = True
+            if sort_sets and (t is set or t is frozenset):
+                items = _sorted_total(o)
+            else:
+                items = o
+            for v in items:
+                if first:
+                    first = False
+                else:
+                    append(item_separator)
+                if type(v) in _ATOMIC_TYPES:
+                    append(repr(v))
+                else:
+                    yield from _walk(v)
+                if len(chunks) >= chunk_size:
+                    yield ''.join(chunks)
+                    chunks.clear()
+            if t is tuple and len(o) == 1:
+                append(',')
+            append(_CLOSERS[t])
+            markers.discard(id(o))
+
+        elif t in _ATOMIC_TYPES or not compact:
+            append(repr(o))
+
+        else:
+            append(remove_spaces(repr(o)))
+
+    yield from _walk(obj)
+    if chunks:
+        yield ''.join(chunks)
+
+
+# Pretty-printer used by pyon_encode(indent=...)
+
+# Types with a layout of their own in pprint; an object holding any of them is
+# handed to pprint.pformat whole.
+_PPRINT_OWN_REPRS = frozenset(t.__repr__ for t in (
+    bytearray, collections.OrderedDict, collections.defaultdict, collections.Counter,
+    collections.ChainMap, collections.deque, collections.UserDict, collections.UserList,
+    collections.UserString, types.MappingProxyType, types.SimpleNamespace))
+_PPRINT_WORD = re.compile(r'\S*\s*')
+
+# Kinds of _pformat container nodes
+_PP_DICT = 0
+_PP_ITEMS = 1
+_PP_TEXT = 2
+
+
+class _PprintFallback(Exception):
+    """ Raised by _pformat's measuring walk on reaching a type it leaves to pprint. """
+
+    def __init__(self, t: type):
+        super().__init__(t)
+        self.type = t
+
+
+class _PprintSortKey:
+    """
+    pprint's sort key for dict keys and set items: their natural order, or for two
+    values that do not compare, the name of their type and then their id().
+    """
+    __slots__ = ('obj',)
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+    def __lt__(self, other: '_PprintSortKey') -> bool:
+        try:
+            return self.obj < other.obj
+        except TypeError:
+            return (str(type(self.obj)), id(self.obj)) < (str(type(other.obj)), id(other.obj))
+
+
+def _sorted_pprint(values: Iterable) -> list:
+    """ sorted(values) as pprint sorts dict keys and set items; plain sorted() when all are str or all are int. """
+    kinds = set(map(type, values))
+    if len(kinds) == 1 and kinds <= _NATIVELY_ORDERED:
+        return sorted(values)
+    return sorted(values, key=_PprintSortKey)
+
+
+def _pformat(obj: Any, indent: int, width: int, sort_keys: bool=False, canonical: bool=False) -> str:
+    """
+    pprint.pformat(obj, indent=indent, width=width), in time linear in the output.
+
+    The layout is pprint's: a container that does not fit on the rest of its line
+    starts its first item after the opening bracket and each following item on
+    its own line, indent spaces deeper than the bracket, and a long str or bytes
+    value is split into implicitly concatenated pieces. pprint repr()s every
+    subtree again at each level it visits; here a first walk builds a tree holding
+    the repr() of every leaf and the one-line width of every container, computed
+    bottom-up, so each value is repr()'d and measured once. A second walk writes it.
+    Dict keys, and the items of sets that do not fit on one line, are sorted as
+    pprint sorts them: in their natural order, with values that do not compare
+    (such as 'a' and b'b') ordered by type name. With sort_keys, dict keys are
+    sorted in the total order of sort_dict_keys() instead; with canonical, the
+    items of every set are too, also those that fit on one line. Objects holding
+    types that pprint lays out specially, such as OrderedDict, deque or dataclasses,
+    are formatted by pprint itself, which cannot apply sort_keys or canonical.
+    """
+    indent = int(indent)
+    width = int(width)
+    if indent < 0:
+        raise ValueError('indent must be >= 0')
+    if not width:
+        raise ValueError('width must be != 0')
+    markers = set()     # ids of containers being measured, to report recursion as pprint does
+    sorted_keys = _sorted_total if sort_keys else _sorted_pprint
+
+    # A node is the repr() of a builtin scalar that pprint never splits, or a list
+    # starting with its one-line width and kind:
+    #   [width, _PP_DICT, items]                           items are (key, value) nodes, sorted
+    #   [width, _PP_ITEMS, opener, closer, items, values, shift]
+    #       values: for a set, its items to sort when broken (else None, also when
+    #       canonical has sorted them already); shift: extra indent of the items,
+    #       for 'frozenset({'
+    #   [width, _PP_TEXT, value, text]     any other repr(); value is set for a str or
+    #                                      bytes, which pprint splits if it does not fit
+    def measure(o):
+        t = type(o)
+        if t in _ATOMIC_TYPES:
+            text = repr(o)
+            # pprint writes a str without whitespace, or a bytes of up to 4, as one piece
+            if t is str and not o.isalnum() or t is bytes and len(o) > 4:
+                return [len(text), _PP_TEXT, o, text]
+            return text
+
+        r = t.__repr__
+        if r is dict.__repr__:
+            if not o:
+                return [2, _PP_DICT, []]
+            if id(o) in markers:
+                return f"<Recursion on {t.__name__} with id={id(o)}>"
+            markers.add(id(o))
+            items = []
+            size = 4 * len(o)
+            for k in sorted_keys(o):
+                v = o[k]
+                k = repr(k) if type(k) in _ATOMIC_TYPES else measure(k)
+                v = measure(v)
+                size += (len(k) if type(k) is str else k[0]) + (len(v) if type(v) is str else v[0])
+                items.append((k, v))
+            markers.discard(id(o))
+            return [size, _PP_DICT, items]
+
+        if r is list.__repr__ or r is tuple.__repr__:
+            is_list = r is list.__repr__
+            opener, closer = ('[', ']') if is_list else ('(', ',)' if len(o) == 1 else ')')
+            if not o:
+                return [2, _PP_ITEMS, opener, closer, [], None, 0]
+            if id(o) in markers:
+                return f"<Recursion on {t.__name__} with id={id(o)}>"
+            markers.add(id(o))
+            items = [measure(v) for v in o]
+            markers.discard(id(o))
+            size = len(opener) + len(closer) + 2 * (len(o) - 1)
+            for v in items:
+                size += len(v) if type(v) is str else v[0]
+            return [size, _PP_ITEMS, opener, closer, items, None, 0]
+
+        if r is set.__repr__ or r is frozenset.__repr__:
+            if not o:
+                return repr(o) if t is set or t is frozenset else [len(repr(o)), _PP_TEXT, None, repr(o)]
+            opener, closer = ('{', '}') if t is set else (t.__name__ + '({', '})')
+            values = _sorted_total(o) if canonical else list(o)
+            items = [measure(v) for v in values]
+            size = len(opener) + len(closer) + 2 * (len(o) - 1)
+            for v in items:
+                size += len(v) if type(v) is str else v[0]
+            return [size, _PP_ITEMS, opener, closer, items, None if canonical else values, len(opener) - 1]
+
+        if r in _PPRINT_OWN_REPRS or hasattr(t, '__dataclass_fields__'):
+            raise _PprintFallback(t)
+        text = repr(o)
+        return [len(text), _PP_TEXT, o if r is str.__repr__ or r is bytes.__repr__ else None, text]
+
+    try:
+        tree = measure(obj)
+    except _PprintFallback as e:
+        if sort_keys or canonical:
+            raise ValueError(f"sort_keys and canonical are not supported with indent for an object "
+                             f"holding {e.type.__name__}, which pprint lays out itself") from None
+        import pprint
+        return pprint.pformat(obj, indent=indent, width=width)
+
+    out = []
+    append = out.append
+
+    def write_flat(node):
+        if type(node) is str:
+            append(node)
+            return
+        kind = node[1]
+        if kind == _PP_TEXT:
+            append(node[3])
+            return
+        if kind == _PP_DICT:
+            append('{')
+            first = True
+            for k, v in node[2]:
+                if first:
+                    first = False
+                else:
+                    append(', ')
+                if type(k) is str:
+                    append(k)
+                else:
+                    write_flat(k)
+                append(': ')
+                if type(v) is str:
+                    append(v)
+                elif v[1] == _PP_TEXT:
+                    append(v[3])
+                else:
+                    write_flat(v)
+            append('}')
+            return
+        append(node[2])
+        first = True
+        for item in node[4]:
+            if first:
+                first = False
+            else:
+                append(', ')
+            if type(item) is str:
+                append(item)
+            elif item[1] == _PP_TEXT:
+                append(item[3])
+            else:
+                write_flat(item)
+        append(node[3])
+
+    def write(node, column, allowance, root):
+        # column: where node starts on its line; allowance: width of what must follow it there
+        if type(node) is str:
+            append(node)
+            return
+        if node[0] <= width - column - allowance:
+            write_flat(node)
+            return
+        kind = node[1]
+        if kind == _PP_TEXT:
+            if node[2] is None:
+                append(node[3])
+            else:
+                write_text(node[2], column, allowance, root)
+            return
+        if kind == _PP_DICT:
+            append('{')
+            if indent > 1:
+                append(' ' * (indent - 1))
+            items = node[2]
+            column += indent
+            delimiter = ',\n' + ' ' * column
+            last = len(items) - 1
+            for i, (k, v) in enumerate(items):
+                write_flat(k)
+                append(': ')
+                write(v, column + _node_width(k) + 2, allowance + 1 if i == last else 1, False)
+                if i != last:
+                    append(delimiter)
+            append('}')
+            return
+        _, _, opener, closer, items, values, shift = node
+        if values is not None:
+            by_value = dict(zip(values, items))
+            items = [by_value[v] for v in _sorted_pprint(values)]
+        append(opener)
+        column += shift + indent
+        if indent > 1:
+            append(' ' * (indent - 1))
+        delimiter = ',\n' + ' ' * column
+        last = len(items) - 1
+        for i, item in enumerate(items):
+            write(item, column, allowance + len(closer) if i == last else 1, False)
+            if i != last:
+                append(delimiter)
+        append(closer)
+
+    def write_text(value, column, allowance, root):
+        # a str or bytes too long for its line, split as pprint splits it
+        if not value or isinstance(value, bytes) and len(value) <= 4:
+            append(repr(value))
+            return
+        if root:
+            column += 1
+            allowance += 1
+        if isinstance(value, str):
+            chunks = _split_str_repr(value, width - column, allowance)
+        else:
+            chunks = _split_bytes_repr(value, width - column, allowance)
+        if len(chunks) == 1 and isinstance(value, str):
+            append(chunks[0])
+            return
+        if root:
+            append('(')
+        append(('\n' + ' ' * column).join(chunks))
+        if root:
+            append(')')
+
+    write(tree, 0, 0, True)
+    return ''.join(out)
+
+
+def _node_width(node) -> int:
+    """ One-line width of a _pformat node. """
+    return len(node) if type(node) is str else node[0]
+
+
+def _split_str_repr(value: str, max_width: int, allowance: int) -> List[str]:
+    """ repr()s of the pieces pprint splits a long string into: lines, then runs of words. """
+    chunks = []
+    lines = value.splitlines(True)
+    max_width1 = max_width
+    for i, line in enumerate(lines):
+        rep = repr(line)
+        is_last_line = i == len(lines) - 1
+        if is_last_line:
+            max_width1 -= allowance
+        if len(rep) <= max_width1:
+            chunks.append(rep)
+            continue
+        parts = _PPRINT_WORD.findall(line)
+        parts.pop()     # the empty match at the end
+        max_width2 = max_width
+        current = ''
+        for j, part in enumerate(parts):
+            candidate = current + part
+            if is_last_line and j == len(parts) - 1:
+                max_width2 -= allowance
+            if len(repr(candidate)) > max_width2:
+                if current:
+                    chunks.append(repr(current))
+                current = part
+            else:
+                current = candidate
+        if current:
+            chunks.append(repr(current))
+    return chunks
+
+
+def _split_bytes_repr(value: bytes, max_width: int, allowance: int) -> List[str]:
+    """ repr()s of the pieces pprint splits a long bytes value into, 4 bytes at a time. """
+    chunks = []
+    current = b''
+    last = len(value) // 4 * 4
+    for i in range(0, len(value), 4):
+        part = value[i:i + 4]
+        candidate = current + part
+        if i == last:
+            max_width -= allowance
+        if len(repr(candidate)) > max_width:
+            if current:
+                chunks.append(repr(current))
+            current = part
+        else:
+            current = candidate
+    if current:
+        chunks.append(repr(current))
+    return chunks
+
+
+# Single-pass PYON scanner used by pyon_decode
+
+class _PyonScanError(ValueError):
+    """Raised when text is outside the grammar handled by the PYON scanner."""
+
+    def __init__(self, msg: str, pos: int):
+        super().__init__(f"{msg}: position {pos}")
+        self.msg = msg
+        self.pos = pos
+
+
+# Whitespace and '#' comments are skipped as one run, so comments cost nothing
+# extra in the scanner. At the top level only forms that ast.literal_eval also
+# accepts are matched: comment lines before the value, and a comment after it.
+_SKIPPABLE = ' \t\n\r\f#'
+_match_ws = re.compile(r'[ \t\n\r\f]*(?:#[^\r\n]*[ \t\n\r\f]*)*').match
+_match_leading = re.compile(r'[ \t]*(?:(?:#[^\r\n]*)?(?:\r\n|[\r\n]))*').match
+_match_trailing = re.compile(r'[ \t\f]*(?:#[^\r\n]*)?(?:[\r\n]+(?:#[^\r\n]*)?)*\Z').match
+# [0-9], not \d: Python number literals are ASCII digits only
+_match_number = re.compile(r'[-+]?(?:([0-9]+)(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?').match
+_match_name = re.compile(r'\w+').match
+_match_set_call = re.compile(r'\([ \t\n\r\f]*\)').match
+_NUMBER_TAIL = frozenset('0123456789_.abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+# Escapes the unicode_escape codec decodes exactly as Python literals do: not invalid
+# escapes or octal escapes above \377 (which the codec warns about), nor \r line
+# continuations. String bodies with only these are decoded in one C call.
+_CODEC_ESCAPE = r'\\(?:[\\\'"abfnrtv0-3xuUN\n]|[4-7](?![0-7]{2}))'
+_STRING_MATCHERS = {
+    "'": re.compile(r"'([^'\\\n\r]*(?:" + _CODEC_ESCAPE + r"[^'\\\n\r]*)*)'").match,
+    '"': re.compile(r'"([^"\\\n\r]*(?:' + _CODEC_ESCAPE + r'[^"\\\n\r]*)*)"').match,
+}
+# Any string literal, for the bodies _STRING_MATCHERS do not match.
+_ANY_STRING_MATCHERS = {
+    "'": re.compile(r"'([^'\\\n\r]*(?:\\(?:\r\n|[\s\S])[^'\\\n\r]*)*)'").match,
+    '"': re.compile(r'"([^"\\\n\r]*(?:\\(?:\r\n|[\s\S])[^"\\\n\r]*)*)"').match,
+}
+_match_concat = re.compile(r'[ \t\f]*([\'"])').match
+_CONCAT_LEADS = frozenset(' \t\f\'"')
+# the codec function itself: str.decode() looks the codec up by name on every call
+_unicode_escape_decode = codecs.unicode_escape_decode
+_ESCAPE_RE = re.compile(
+    r'\\(?:([0-7]{1,3})|x([0-9a-fA-F]{2})|u([0-9a-fA-F]{4})|U([0-9a-fA-F]{8})'
+    r'|N\{([^}\n]*)\}|(\r\n|[\s\S]))')
+_match_codec_escapes = re.compile(r'[^\\\r]*(?:' + _CODEC_ESCAPE + r'[^\\\r]*)*\Z').match
+_SIMPLE_ESCAPES = {
+    '\n': '', '\r\n': '', '\r': '', '\\': '\\', "'": "'", '"': '"',
+    'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+}
+_NAMED_CONSTANTS = {'True': True, 'False': False, 'None': None}
+# Forms the scanner leaves to ast.literal_eval although they may be valid PYON.
+_UNSUPPORTED_NUMBER = "Unsupported number"
+_UNSUPPORTED_PREFIX = "Unsupported string prefix"
+# Documents with more backslashes than this many per quote character (half as many
+# per string literal) go straight to ast.literal_eval, which is faster than the scanner
+# on strings with long runs of escapes. Short strings with a few escapes each, the
+# usual case, scan faster: the cost there is per literal, not per escape.
+_ESCAPES_PER_QUOTE_LIMIT = 4
+
+
+# JSON documents that are also PYON with the same meaning can go through the
+# C json scanner. Excluded: true/false/null (not PYON), NaN/Infinity, the \/
+# and surrogate-pair escapes (decoded differently by Python), and anything with
+# surrounding whitespace (Python is pickier about it than JSON).
+_JSON_FIRST = frozenset('{["-0123456789')
+_JSON_LAST = frozenset('}]"0123456789')
+_search_json_surrogate_escape = re.compile(r'\\u[dD][89a-fA-F]').search
+
+
+def _reject_json_constant(name: str):
+    raise ValueError(f"{name} is not valid PYON")
+
+
+_json_decode = json.JSONDecoder(parse_constant=_reject_json_constant).decode
+
+
+def _parse_finite_float(text: str) -> float:
+    value = float(text)
+    if value - value != 0.0:
+        raise ValueError("Number too large for a float is not valid PYON")
+    return value
+
+
+# for json_to_pyon, whose output must decode again
+_json_decode_finite = json.JSONDecoder(parse_constant=_reject_json_constant,
+                                       parse_float=_parse_finite_float).decode
+
+
+def _is_json_subset(s: str) -> bool:
+    """ Cheap test whether s can be decoded as JSON with identical PYON results. """
+    if s[0] not in _JSON_FIRST or s[-1] not in _JSON_LAST:
+        return False
+    # a ' before the first " is outside any JSON string (str.find and `in` run in C,
+    # much faster than a regex search over the whole text)
+    apostrophe = s.find("'")
+    if apostrophe >= 0 and not 0 <= s.find('"') < apostrophe:
+        return False
+    return ('true' not in s and 'false' not in s and 'null' not in s and '\\/' not in s
+            and ('\\u' not in s or not _search_json_surrogate_escape(s))
+            and _find_forbidden(s) < 0)
+
+
+def _is_escape_heavy(s: str) -> bool:
+    """ Whether s has enough escapes per string literal that ast.literal_eval decodes it faster. """
+    escapes = s.count('\\')
+    return escapes > 0 and escapes > _ESCAPES_PER_QUOTE_LIMIT * (s.count("'") + s.count('"'))
+
+
+def _find_forbidden(s: str) -> int:
+    """ Index of the first null byte or surrogate in s, or -1. """
+    null = s.find('\x00')
+    if s.isascii():
+        return null
+    # surrogates are the only characters the strict UTF-8 codec refuses; encoding runs
+    # in C, far faster than a regex search (done a chunk at a time, to bound the copy)
+    end = len(s) if null < 0 else null
+    for start in range(0, end, _BUFFER_CHUNK_SIZE):
+        try:
+            s[start:min(start + _BUFFER_CHUNK_SIZE, end)].encode('utf-8')
+        except UnicodeEncodeError as e:
+            return start + e.start
+    return null
+
+
+def _scan_pyon(s: str) -> Any:
+    """
+    Decode a complete PYON document with the single-pass scanner.
+
+    Raises:
+        _PyonScanError: if the text is outside the scanner grammar.
+    """
+    forbidden = _find_forbidden(s)
+    if forbidden >= 0:
+        raise _PyonScanError("Null byte or surrogate in source", forbidden)
+    value, end = _scan_value(s, _match_leading(s).end())
+    if end != len(s) and not _match_trailing(s, end):
+        raise _PyonScanError("Extra data", end)
+    return value
+
+
+def _scan_value(s: str, idx: int):
+    """ Scan one value starting exactly at idx. Returns (value, end). """
+    ch = s[idx:idx + 1]
+    if ch == "'" or ch == '"':
+        return _scan_string(s, idx)
+    if ch == '[':
+        return _scan_list(s, idx + 1)
+    if ch == '{':
+        return _scan_brace(s, idx + 1)
+    if ch == '(':
+        return _scan_paren(s, idx + 1)
+
+    m = _match_number(s, idx)
+    if m is not None:
+        end = m.end()
+        if s[end:end + 1] in _NUMBER_TAIL:
+            raise _PyonScanError(_UNSUPPORTED_NUMBER, idx)
+        integer, frac, exp = m.groups()
+        if frac is None and exp is None and integer is not None:
+            if integer[0] == '0' and integer.strip('0'):
+                raise _PyonScanError("Leading zeros in integer", idx)
+            try:
+                return int(m.group()), end
+            except ValueError:
+                # more digits than sys.get_int_max_str_digits() allows
+                raise _PyonScanError("Integer literal too long", idx) from None
+        return float(m.group()), end
+
+    m = _match_name(s, idx)
+    if m is not None:
+        name = m.group()
+        end = m.end()
+        if name in _NAMED_CONSTANTS:
+            return _NAMED_CONSTANTS[name], end
+        if name == 'set':
+            m = _match_set_call(s, end)
+            if m is not None:
+                return set(), m.end()
+        if s[end:end + 1] in _STRING_MATCHERS:
+            raise _PyonScanError(_UNSUPPORTED_PREFIX, idx)
+        raise _PyonScanError(f"Unsupported name {name!r}", idx)
+
+    raise _PyonScanError("Expecting value", idx)
+
+
+def _scan_string(s: str, idx: int):
+    """ Scan a quoted string, joining implicitly concatenated literals. """
+    chunks = []
+    while True:
+        quote = s[idx]
+        m = _STRING_MATCHERS[quote](s, idx)
+        if m is not None:
+            end = m.end()
+            if end == idx + 2 and s[end:end + 1] == quote:
+                # a triple-quoted string, not '' followed by another literal: left to ast.literal_eval
+                raise _PyonScanError("Triple-quoted string", idx)
+            body = m.group(1)
+            if '\\' in body:
+                body = _codec_unescape(body, idx)
+        else:
+            m = _ANY_STRING_MATCHERS[quote](s, idx)
+            if m is None:
+                raise _PyonScanError("Unterminated string", idx)
+            end = m.end()
+            body = _unescape_each(m.group(1), idx)
+        if s[end:end + 1] not in _CONCAT_LEADS:
+            # the usual case: a single literal
+            if not chunks:
+                return body, end
+            chunks.append(body)
+            return ''.join(chunks), end
+        chunks.append(body)
+        m = _match_concat(s, end)
+        if m is None:
+            return ''.join(chunks), end
+        idx = m.start(1)
+
+
+def _unescape(body: str, pos: int) -> str:
+    """ Resolve Python backslash escapes in a string body. """
+    if _match_codec_escapes(body):
+        return _codec_unescape(body, pos)
+    return _unescape_each(body, pos)
+
+
+def _codec_unescape(body: str, pos: int) -> str:
+    """ _unescape for a body with only _CODEC_ESCAPE escapes, in one C call where possible. """
+    try:
+        # latin-1 maps the body's characters to the bytes unicode_escape reads them back as;
+        # characters beyond latin-1 become \u escapes, which it reads back the same way
+        # (no escape in the body ends just before one, so none can absorb it)
+        return _unicode_escape_decode(body.encode('latin-1', 'backslashreplace'))[0]
+    except UnicodeDecodeError:
+        raise _PyonScanError("Invalid escape", pos) from None
+
+
+def _unescape_each(body: str, pos: int) -> str:
+    """ _unescape, resolving the escapes one by one. """
+
+    def replace(m):
+        octal, hex2, hex4, hex8, name, other = m.groups()
+        if octal is not None:
+            return chr(int(octal, 8))
+        code = hex2 or hex4 or hex8
+        if code is not None:
+            code = int(code, 16)
+            if code > 0x10FFFF:
+                raise _PyonScanError("Illegal Unicode character", pos)
+            return chr(code)
+        if name is not None:
+            import unicodedata
+            try:
+                char = unicodedata.lookup(name)
+            except KeyError:
+                char = ''
+            if len(char) != 1:
+                raise _PyonScanError("Unknown Unicode character name", pos)
+            return char
+        if other in _SIMPLE_ESCAPES:
+            return _SIMPLE_ESCAPES[other]
+        if other in 'xuUN':
+            raise _PyonScanError("Truncated escape", pos)
+        return '\\' + other
+
+    return _ESCAPE_RE.sub(replace, body)
+
+
+def _scan_items(s: str, idx: int, closer: str, values: list) -> int:
+    """ Scan ', value' repeats up to closer, appending to values. Returns end. """
+    append = values.append
+    while True:
+        ch = s[idx:idx + 1]
+        if ch in _SKIPPABLE:
+            idx = _match_ws(s, idx).end()
+            ch = s[idx:idx + 1]
+        if ch == closer:
+            return idx + 1
+        if ch != ',':
+            raise _PyonScanError(f"Expecting ',' or '{closer}'", idx)
+        idx = _match_ws(s, idx + 1).end()
+        if s[idx:idx + 1] == closer:
+            return idx + 1
+        value, idx = _scan_value(s, idx)
+        append(value)
+
+
+def _scan_list(s: str, idx: int):
+    idx = _match_ws(s, idx).end()
+    values = []
+    if s[idx:idx + 1] == ']':
+        return values, idx + 1
+    value, idx = _scan_value(s, idx)
+    values.append(value)
+    return values, _scan_items(s, idx, ']', values)
+
+
+def _scan_paren(s: str, idx: int):
+    idx = _match_ws(s, idx).end()
+    if s[idx:idx + 1] == ')':
+        return (), idx + 1
+    value, idx = _scan_value(s, idx)
+    idx = _match_ws(s, idx).end()
+    if s[idx:idx + 1] == ')':
+        # parenthesized value, not a tuple
+        return value, idx + 1
+    values = [value]
+    idx = _scan_items(s, idx, ')', values)
+    return tuple(values), idx
+
+
+def _scan_brace(s: str, idx: int):
+    idx = _match_ws(s, idx).end()
+    if s[idx:idx + 1] == '}':
+        return {}, idx + 1
+    key, idx = _scan_value(s, idx)
+    idx = _match_ws(s, idx).end()
+    if s[idx:idx + 1] != ':':
+        values = [key]
+        idx = _scan_items(s, idx, '}', values)
+        return set(values), idx
+
+    result = {}
+    while True:
+        value, idx = _scan_value(s, _match_ws(s, idx + 1).end())
+        result[key] = value
+        ch = s[idx:idx + 1]
+        if ch in _SKIPPABLE:
+            idx = _match_ws(s, idx).end()
+            ch = s[idx:idx + 1]
+        if ch == '}':
+            return result, idx + 1
+        if ch != ',':
+            raise _PyonScanError("Expecting ',' or '}'", idx)
+        idx = _match_ws(s, idx + 1).end()
+        if s[idx:idx + 1] == '}':
+            return result, idx + 1
+        key, idx = _scan_value(s, idx)
+        idx = _match_ws(s, idx).end()
+        if s[idx:idx + 1] != ':':
+            raise _PyonScanError("Expecting ':'", idx)
+
+
+# Incremental reader used by iterdecode and pyon_load
+
+# Characters the reader has to look at; everything else is skipped in bulk.
+_search_structure = re.compile(r"""['"#()\[\]{},:]""").search
+_match_stream_string = re.compile(
+    r"""'''[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*(?:'''|\Z)"""
+    r'''|"""[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*(?:"""|\Z)'''
+    r"""|'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'?"""
+    r'''|"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"?''').match
+# the whitespace Python's tokenizer skips; \s would also match non-ASCII spaces, which it rejects
+_BLANK_CHARS = ' \t\f\r\n'
+_match_blank = re.compile(r'(?:[ \t\f\r\n]+|#[^\n]*)*').match
+_CLOSER_FOR = {'[': ']', '(': ')', '{': '}'}
+_BUFFER_CHUNK_SIZE = 1 << 20     # pyon_decode streams buffers larger than this
+_NO_ITEM = object()
+
+
+def _iter_text_chunks(source, chunk_size: int, release_pages: bool=False) -> Iterator[str]:
+    """
+    Normalize a str, file (text or binary), bytes-like buffer or iterable of str
+    into an iterator of str chunks. Bytes are decoded as UTF-8 incrementally.
+    """
+    if isinstance(source, str):
+        return iter([source])
+    try:
+        view = memoryview(source).cast('B')
+    except TypeError:
+        pass
+    else:
+        return _decode_utf8_chunks(_iter_buffer_slices(source, view, chunk_size, release_pages))
+    if hasattr(source, 'read'):
+        return _decode_utf8_chunks(iter(lambda: source.read(chunk_size) or None, None))
+    return iter(source)
+
+
+def _iter_buffer_slices(source, view: memoryview, chunk_size: int, release_pages: bool) -> Iterator[memoryview]:
+    """
+    Slice a buffer into chunks. With release_pages, for an mmap, pages already consumed
+    are dropped from the process (MADV_DONTNEED) so resident memory does not grow with
+    the file; the caller vouches that the mapping is a read-only view of a file.
+    """
+    madvise = getattr(source, 'madvise', None) if release_pages else None
+    dontneed = getattr(mmap, 'MADV_DONTNEED', None)
+    if madvise is None or dontneed is None or chunk_size % mmap.PAGESIZE:
+        madvise = None
+    for start in range(0, view.nbytes, chunk_size):
+        yield view[start:start + chunk_size]
+        if madvise is not None:
+            madvise(dontneed, start, min(chunk_size, view.nbytes - start))
+
+
+def _decode_utf8_chunks(chunks: Iterable) -> Iterator[str]:
+    """ Pass str chunks through; decode bytes-like chunks as one UTF-8 stream. """
+    decoder = None
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    if decoder is not None:
+        decoder.decode(b'', final=True)    # raises on a truncated multi-byte sequence
+
+
+def _decode_fragment(text: str) -> Any:
+    """
+    Decode the text of one item cut out of an enclosing container. It may carry
+    line breaks or comments that are only legal inside brackets, so retry inside
+    brackets if it does not decode on its own. The text is wrapped as it stands:
+    it ran up to a ',', ':' or closing bracket in the document, so ending it with
+    ']' keeps a trailing backslash or comment exactly as (il)legal as it was there.
+    """
+    stripped = text.strip(_BLANK_CHARS)
+    try:
+        return pyon_decode(stripped)
+    except PyonDecodeError as e:
+        error = e
+    try:
+        return pyon_decode('[' + text + ']')[0]
+    except PyonDecodeError:
+        pass
+    # report the error from decoding the text as it stands, located in text
+    if error.pos is None:
+        raise error
+    raise PyonDecodeError(error.msg, text, error.pos + len(text) - len(text.lstrip(_BLANK_CHARS)))
+
+
+class _PyonStreamReader:
+    """
+    Split a PYON document arriving in chunks into its top-level items.
+
+    Only brackets, commas, colons, quotes and comments are examined to find where
+    each item ends; the item's text is then decoded by pyon_decode. The buffer
+    holds the item in progress plus the text read after it, and grows by doubling
+    when one item spans many chunks, so the total work stays linear.
+    """
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._offset = 0                # characters dropped before _buf, for error positions
+        self._lines = 0                 # line breaks dropped before _buf
+        self._line_start = 0            # offset of the start of the line _buf starts in
+        self.opener = None              # '[', '(' or '{'; '' for a document that is not a container
+        self.is_dict = None             # for '{': True for a dict, False for a set
+        self.is_paren_value = False     # for '(': a parenthesized value rather than a tuple
+        self.is_bare_tuple = False      # the container is the first item of a tuple without parentheses
+        self._prefix = ''               # blank text before the top-level container
+
+    def _read_more(self, keep_from: int) -> bool:
+        """ Drop the text before keep_from, then read at least as much text as is kept. """
+        kept = self._buf[keep_from:]
+        parts = [kept]
+        need = max(len(kept), 1)
+        got = 0
+        while got < need:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                break
+            parts.append(chunk)
+            got += len(chunk)
+        if keep_from:
+            breaks = self._buf.count('\n', 0, keep_from)
+            if breaks:
+                self._lines += breaks
+                self._line_start = self._offset + self._buf.rfind('\n', 0, keep_from) + 1
+            self._offset += keep_from
+        self._buf = ''.join(parts)
+        self._pos -= keep_from
+        return got > 0
+
+    def _error(self, msg: str, i: int) -> PyonDecodeError:
+        """ A PyonDecodeError for position i of the buffer, located in the whole stream. """
+        breaks = self._buf.count('\n', 0, i)
+        if breaks:
+            colno = i - self._buf.rfind('\n', 0, i)
+        else:
+            colno = self._offset + i - self._line_start + 1
+        return PyonDecodeError(msg, None, self._offset + i, self._lines + breaks + 1, colno)
+
+    def _decode_at(self, text: str, i: int) -> Any:
+        """ Decode an item whose text starts at position i of the buffer. """
+        try:
+            return _decode_fragment(text)
+        except PyonDecodeError as e:
+            if e.pos is None:
+                raise
+            raise self._error(e.msg, i + e.pos) from None
+
+    def _skip_blank(self) -> str:
+        """ Advance past whitespace and comments, reading more text as needed; return the text skipped. """
+        while True:
+            end = _match_blank(self._buf, self._pos).end()
+            if end < len(self._buf) or self._eof:
+                skipped = self._buf[self._pos:end]
+                self._pos = end
+                return skipped
+            # the blank run (maybe an unfinished comment) reaches the end: rescan with more text
+            self._read_more(self._pos)
+
+    def _next_item(self):
+        """
+        Find the end of the next top-level item, leaving _pos on the ',' or closing
+        bracket after it. Returns (text, colon), colon being the offset of the
+        item's top-level ':' or None.
+        """
+        start = pos = self._pos
+        depth = 0
+        colon = None
+        while True:
+            buf = self._buf
+            m = _search_structure(buf, pos)
+            if m is None:
+                if self._eof:
+                    raise self._error("unexpected end of data", len(buf))
+                self._pos = len(buf)
+                self._read_more(start)
+                pos, start = self._pos, 0
+                continue
+            ch = m.group()
+            i = m.start()
+            if ch == "'" or ch == '"' or ch == '#':
+                if ch == '#':
+                    end = buf.find('\n', i)
+                    end = len(buf) if end < 0 else end + 1
+                else:
+                    end = _match_stream_string(buf, i).end()
+                if end + 1 >= len(buf) and not self._eof:
+                    # the token may continue in the next chunk (it can only stop short of
+                    # the end at a newline or a trailing backslash): rescan with more text
+                    self._pos = i
+                    self._read_more(start)
+                    pos, start = self._pos, 0
+                    continue
+                pos = end
+            elif ch in '([{':
+                depth += 1
+                pos = i + 1
+            elif depth:
+                if ch in ')]}':
+                    depth -= 1
+                pos = i + 1
+            elif ch == ':':
+                if colon is None:
+                    colon = i - start
+                pos = i + 1
+            else:
+                # ',' or a closing bracket at the top level
+                self._pos = i
+                return buf[start:i], colon
+
+    def _check_top_level(self, suffix: str, at: int) -> None:
+        """
+        Check the blank text around the top-level container (line breaks and
+        indentation matter outside brackets) by decoding it with the container
+        replaced by 0. at is the buffer position of suffix, for errors.
+        """
+        prefix = self._prefix
+        if '\n' not in prefix and '\n' not in suffix and '#' not in suffix:
+            return
+        try:
+            pyon_decode(prefix + '0' + suffix)
+        except PyonDecodeError as e:
+            if e.pos is None or e.pos <= len(prefix):
+                raise PyonDecodeError(e.msg, None, e.pos) from None
+            raise self._error(e.msg, at + e.pos - len(prefix) - 1) from None
+
+    def iter_items(self) -> Iterator[Any]:
+        self._prefix = self._skip_blank()
+        if self._pos >= len(self._buf):
+            raise self._error("no data", self._pos)
+        ch = self._buf[self._pos]
+        if ch not in _CLOSER_FOR:
+            # not a container: the document is a single value
+            self.opener = ''
+            while self._read_more(self._pos):
+                pass
+            text = self._prefix + self._buf[self._pos:]
+            try:
+                value = pyon_decode(text)
+            except PyonDecodeError as e:
+                if e.pos is None:
+                    raise
+                raise self._error(e.msg, self._pos + e.pos - len(self._prefix)) from None
+            yield value
+            return
+
+        self._check_top_level('', self._pos)
+        self.opener = ch
+        closer = _CLOSER_FOR[ch]
+        self._pos += 1
+        count = 0
+        trailing_comma = False
+        while True:
+            text, colon = self._next_item()
+            start = self._pos - len(text)
+            sep = self._buf[self._pos]
+            self._pos += 1
+            if _match_blank(text).end() == len(text):
+                # no value: only allowed in an empty container or after a trailing comma
+                if sep != closer or (count and not trailing_comma):
+                    raise self._error(f"expecting value before {sep!r}", self._pos - 1)
+                break
+            if sep != ',' and sep != closer:
+                raise self._error(f"unexpected {sep!r}", self._pos - 1)
+
+            if ch == '{' and self.is_dict is None:
+                self.is_dict = colon is not None
+            if self.is_dict:
+                if colon is None:
+                    raise self._error("expecting ':' in dict item", start + len(text) - len(text.lstrip(_BLANK_CHARS)))
+                key = self._decode_at(text[:colon], start)
+                yield key, self._decode_at(text[colon + 1:], start + colon + 1)
+            elif colon is not None:
+                raise self._error("unexpected ':'", start + colon)
+            else:
+                yield self._decode_at(text, start)
+
+            count += 1
+            trailing_comma = sep == ','
+            if sep == closer:
+                break
+
+        if ch == '(' and count == 1 and not trailing_comma:
+            self.is_paren_value = True
+        suffix = self._skip_blank()
+        if self._pos < len(self._buf) and self._buf[self._pos] == ',':
+            # '[1], [2]': the container is the first item of a tuple; see rest_items
+            self.is_bare_tuple = True
+            self._pos -= len(suffix)
+            return
+        if self._pos < len(self._buf):
+            raise self._error(f"extra data after {closer!r}", self._pos)
+        self._check_top_level(suffix, self._pos - len(suffix))
+
+    def rest_items(self) -> tuple:
+        """
+        After iter_items has set is_bare_tuple, decode the items of that tuple that
+        follow the container. The rest of the document is read whole and decoded at
+        the top level, with the container replaced by 0, so that line breaks end it
+        just as they do for pyon_decode.
+        """
+        more = self._read_more(self._pos)
+        while more:
+            more = self._read_more(0)
+        prefix = self._prefix
+        try:
+            return pyon_decode(prefix + '0' + self._buf)[1:]
+        except PyonDecodeError as e:
+            if e.pos is None or e.pos <= len(prefix):
+                raise PyonDecodeError(e.msg, None, e.pos) from None
+            raise self._error(e.msg, e.pos - len(prefix) - 1) from None
+
+
+# Utility for Compact Representation
+
+# Tokens kept by remove_spaces: runs of non-whitespace outside quotes, and quoted
+# strings (single or double, with backslash escapes). Whitespace between them is
+# never matched, so joining the matches drops it. A '#' comment outside quotes is
+# matched outside the group and contributes ''. An unterminated string runs to
+# the end of the text, as it would for a character-by-character scanner.
+_findall_compact_tokens = re.compile(
+    r"""([^'"# \t\r\n]+|'[^'\\]*(?:\\[\s\S][^'\\]*)*'?|"[^"\\]*(?:\\[\s\S][^"\\]*)*"?)|#[^\r\n]*""").findall
+
+
+def remove_spaces(pyon_str: str) -> str:
+    """
+    Remove whitespace and comments from a PYON string, ignoring whitespace inside quotes.
+
+    Single pass over the string: quote state is tracked for both ' and " strings,
+    including backslash-escaped quotes, and only the structural whitespace between
+    tokens (spaces, tabs, newlines) and '#' comments are removed. A '#' inside a
+    string is kept.
+
+    Args:
+        pyon_str: The input string in PYON format.
+
+    Returns:
+        str: The string with whitespace and comments removed outside quoted substrings.
+    """
+    return ''.join(_findall_compact_tokens(pyon_str))
+
+
+# PYON to JSON Converter
+def pyon_to_json(obj: Any, set_order: str='iterated') -> str:
+    """
+    Convert a PYON-compatible object to JSON format.
+    Raises an error for unsupported non-JSON types.
+    Attempts to get maximum conversion to equivalent types.
+    Tuples, sets and frozensets become arrays.
+    Use a PyonJsonEncoder directly to register conversions for more types.
+
+    Args:
+        obj: The PYON object to convert.
+        set_order: 'iterated' to write set items in the order the set iterates (fastest),
+            or 'sorted' for a deterministic order. Sets keep no insertion order.
+
+    Returns:
+        str: JSON-formatted string.
+
+    Raises:
+        TypeError: If unsupported types are encountered.
+        ValueError: If set_order is not valid.
+    """
+    encoder = _json_encoders.get(set_order) or PyonJsonEncoder(set_order=set_order)
+    if _stats is not None:
+        return _stats.measure('pyon_to_json', None, encoder.encode, obj)
+    return encoder.encode(obj)
+
+
+def pyon_str_to_json(pyon_str: str, set_order: str='iterated') -> str:
+    """
+    Convert PYON text straight to JSON text, without decoding to Python objects.
+
+    Gives the same result as pyon_to_json(pyon_decode(pyon_str)): quotes are rewritten
+    with JSON escaping, True/False/None become true/false/null, tuples become arrays and
+    non-string dict keys are stringified with str().
+    Text outside the token grammar (sets, tuple keys, implicit string concatenation,
+    exotic numbers) is converted through the object route instead, and so are dicts
+    whose keys collide once decoded or stringified (a repeated key, 1 and True, or 1
+    and '1'), so that which of them is kept is decided as pyon_to_json decides it.
+
+    Perfect for conversion of indirect columns for SQL processing that requires JSON.
+
+    Args:
+        pyon_str: The PYON string to convert. Empty input is returned as-is.
+        set_order: how set items are ordered, as for pyon_to_json().
+
+    Returns:
+        str: JSON-formatted string.
+
+    Raises:
+        ValueError: If the input is not valid PYON.
+        TypeError: If the data has no JSON equivalent.
+    """
+    if not pyon_str:
+        return pyon_str
+    if _stats is not None:
+        return _stats.measure('pyon_str_to_json', pyon_str, _pyon_str_to_json, pyon_str, set_order)
+    return _pyon_str_to_json(pyon_str, set_order)
+
+
+def _pyon_str_to_json(pyon_str: str, set_order: str) -> str:
+    """ pyon_str_to_json() without instrumentation. """
+    try:
+        return _transcode_json(pyon_str)
+    except ValueError:
+        # outside the token grammar, or malformed: convert through the decoded object.
+        if _stats is not None:
+            _stats.count('pyon_str_to_json.object_route')
+        return pyon_to_json(pyon_decode(pyon_str), set_order=set_order)
+
+
+def simple_pyon_to_json(pyon_str: str) -> str: # JSON str
+    """
+    Convert a PYON string to JSON format.
+    Raises an error for unsupported non-JSON types.
+    Kept for existing callers; same as pyon_str_to_json().
+
+    Perfect for conversion of indirect columns for SQL processing that requires JSON.
+
+    Args:
+        pyon_str: The PYON string to convert.
+
+    Returns:
+        str: JSON-formatted string.
+
+    Raises:
+        ValueError: If the input is not valid PYON.
+        TypeError: If unsupported types are encountered.
+    """
+    return pyon_str_to_json(pyon_str)
+
+
+def json_to_pyon(json_str: str, compact: bool=False) -> str:
+    """
+    Convert JSON text to canonical PYON text.
+
+    JSON is already PYON, but with double quotes, true/false/null and free whitespace.
+    This gives the repr() spelling, as pyon_encode() would produce it. The document is
+    read by the C json scanner and re-encoded in one walk; NaN and Infinity, which
+    JSON decoders accept but PYON cannot represent, are rejected, and so are numbers
+    too large for a float (such as 1e400), which would decode as inf.
+
+    Useful for bulk migration of JSON archives into PYON.
+
+    Args:
+        json_str: The JSON string to convert. Empty input is returned as-is.
+        compact: if True, use ',' and ':' separators without spaces.
+
+    Returns:
+        str: PYON-formatted string.
+
+    Raises:
+        ValueError: If the input is not valid JSON.
+    """
+    if not json_str:
+        return json_str
+    if _stats is not None:
+        return _stats.measure('json_to_pyon', json_str, _json_to_pyon, json_str, compact)
+    return _json_to_pyon(json_str, compact)
+
+
+def _json_to_pyon(json_str: str, compact: bool) -> str:
+    """ json_to_pyon() without instrumentation. """
+    return pyon_encode(_json_decode_finite(json_str), compact=compact)
+
+
+# Token-level transcoder used by pyon_str_to_json
+
+_finditer_json_tokens = re.compile(r"""
+    [ \t\n\r\f]+ | \#[^\r\n]*
+  | (?P<str>'[^'\\\n\r]*(?:\\(?:\r\n|[\s\S])[^'\\\n\r]*)*'
+          |"[^"\\\n\r]*(?:\\(?:\r\n|[\s\S])[^"\\\n\r]*)*")
+  | (?P<num>[-+]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)
+  | (?P<name>\w+)
+  | (?P<punct>[\[\](){},:])[ \t\n\r\f]*
+  | (?P<other>[\s\S])
+""", re.VERBOSE).finditer
+_match_json_int = re.compile(r'-?(?:0|[1-9][0-9]*)\Z').match
+# sys.set_int_max_str_digits() accepts no lower limit than this; longer integers are
+# checked against the current limit by int(), as pyon_decode checks them.
+_INT_DIGITS_ALWAYS_ALLOWED = 640
+_encode_json_string = json.encoder.encode_basestring_ascii
+_JSON_NAMES = {'True': 'true', 'False': 'false', 'None': 'null'}
+_JSON_KEY_NAMES = {'True': '"True"', 'False': '"False"', 'None': '"None"'}
+
+
+def _json_number(tok: str, pos: int) -> str:
+    """ Rewrite a PYON number token as the JSON text json.dumps would produce. """
+    if _match_json_int(tok) and tok != '-0' and len(tok) <= _INT_DIGITS_ALWAYS_ALLOWED:
+        return tok
+    if '.' in tok or 'e' in tok or 'E' in tok:
+        value = float(tok)
+        if value - value != 0.0:
+            raise _PyonScanError("Non-finite float", pos)
+        return float.__repr__(value)
+    digits = tok.lstrip('+-')
+    if digits[0] == '0' and digits.strip('0'):
+        raise _PyonScanError("Leading zeros in integer", pos)
+    try:
+        return str(int(tok))
+    except ValueError:
+        # more digits than sys.get_int_max_str_digits() allows
+        raise _PyonScanError("Integer literal too long", pos) from None
+
+
+def _transcode_json(s: str) -> str:
+    """
+    Transcode a PYON document to compact, ASCII-only JSON in one pass over its tokens.
+
+    Containers are tracked on an explicit stack of [opener, out index of the opener,
+    item count, seen a comma, next value is a key, set of the keys decoded so far].
+    '(' and '{' are written as placeholders and fixed up at the closer, once it is
+    known whether they held a tuple or a parenthesized value.
+
+    Raises:
+        _PyonScanError: if the text is outside the transcoder grammar.
+    """
+    forbidden = _find_forbidden(s)
+    if forbidden >= 0:
+        raise _PyonScanError("Null byte or surrogate in source", forbidden)
+    out = []
+    append = out.append
+    stack = []
+    frame = None
+    expect_value = True
+    end = len(s)
+    for m in _finditer_json_tokens(s, _match_leading(s).end()):
+        kind = m.lastgroup
+        if kind is None:
+            if frame is None:
+                # a line break or comment before the value
+                raise _PyonScanError("Unexpected whitespace", m.start())
+            continue
+        tok = m.group(kind)
+        pos = m.start()
+        if expect_value:
+            is_key = frame is not None and frame[4]
+            if kind == 'punct' and tok in '[({':
+                if is_key:
+                    raise _PyonScanError("Unsupported key", pos)
+                if frame is not None:
+                    frame[2] += 1
+                stack.append(frame)
+                frame = [tok, len(out), 0, False, tok == '{', set() if tok == '{' else None]
+                append('[' if tok == '[' else '')
+                continue
+            if kind == 'punct' and tok in ')]}':
+                # empty container, or a trailing comma
+                if frame is None or _CLOSER_FOR[frame[0]] != tok or out[-1] == ':':
+                    raise _PyonScanError("Unexpected closer", pos)
+                if out[-1] == ',':
+                    out.pop()
+            elif kind == 'str':
+                body = tok[1:-1]
+                if '\\' in body:
+                    body = _unescape(body, pos)
+                key = _encode_json_string(body)
+                append(key)
+            elif kind == 'num':
+                tok = _json_number(tok, pos)
+                if is_key:
+                    append(f'"{tok}"')
+                    key = int(tok) if _match_json_int(tok) else float(tok)
+                else:
+                    append(tok)
+            elif kind == 'name' and tok in _JSON_NAMES:
+                append(_JSON_KEY_NAMES[tok] if is_key else _JSON_NAMES[tok])
+                key = _NAMED_CONSTANTS[tok]
+            else:
+                raise _PyonScanError("Expecting value", pos)
+            if kind != 'punct':
+                if frame is None:
+                    end = m.end()
+                    break
+                if is_key:
+                    # keys merge in the dict when equal once decoded (1, 1.0 and True), and
+                    # in pyon_to_json when equal once stringified (1 and '1'); str keys are
+                    # tracked by their JSON text, other keys by both
+                    seen = frame[5]
+                    text = out[-1]
+                    if key in seen or text in seen:
+                        raise _PyonScanError("Repeated key", pos)
+                    seen.add(key)
+                    seen.add(text)
+                frame[2] += 1
+                expect_value = False
+                continue
+        elif kind != 'punct' or frame is None:
+            raise _PyonScanError("Expecting ',' or closer", pos)
+        elif tok == ',':
+            if frame[0] == '{' and frame[4]:
+                # a set: left to the object route, which orders its items
+                raise _PyonScanError("Unsupported set", pos)
+            frame[3] = True
+            frame[4] = frame[0] == '{'
+            append(',')
+            expect_value = True
+            continue
+        elif tok == ':':
+            if not frame[4]:
+                raise _PyonScanError("Unexpected ':'", pos)
+            frame[4] = False
+            append(':')
+            expect_value = True
+            continue
+        elif _CLOSER_FOR[frame[0]] != tok:
+            raise _PyonScanError("Unexpected closer", pos)
+        elif frame[4]:
+            raise _PyonScanError("Unsupported set", pos)
+
+        # tok closes frame
+        opener, start, count, has_comma = frame[:4]
+        if opener == '(':
+            # a single value without a comma is parenthesized, not a tuple
+            if count != 1 or has_comma:
+                out[start] = '['
+                append(']')
+        elif opener == '{':
+            out[start] = '{'
+            append('}')
+        else:
+            append(']')
+        frame = stack.pop()
+        expect_value = False
+        if frame is None:
+            end = m.end('punct')
+            break
+    else:
+        raise _PyonScanError("Unexpected end of data", len(s))
+    if end != len(s) and not _match_trailing(s, end):
+        raise _PyonScanError("Extra data", end)
+    return ''.join(out)
+
+
+# Total order over PYON values, for sorting sets and mixed-type dict keys
+
+# None, numbers (bools among them, by value, as plain sorted() orders them), strings,
+# bytes, tuples, frozensets and sets; any other type sorts after these, by type name
+# and then repr(). Subclasses (IntEnum, StrEnum, namedtuple) rank as their builtin base,
+# so they sort among its values as plain sorted() sorts them.
+_ORDER_RANKS = {
+    type(None): 0, bool: 2, int: 2, float: 2, complex: 2,
+    str: 3, bytes: 4, tuple: 5, frozenset: 6, set: 6,
+}
+_OTHER_RANK = 7
+# orders equal numbers of different types, such as 1 and True
+_NUMBER_TYPE_ORDER = {bool: 0, int: 1, float: 2, complex: 3}
+_NATIVELY_ORDERED = frozenset([str, int])
+_INFINITY = float('inf')
+
+
+def _total_order_key(value: Any) -> tuple:
+    """ Sort key that orders any mix of PYON values without comparing unlike types. """
+    t = type(value)
+    rank = _ORDER_RANKS.get(t)
+    if rank is None:
+        t, rank = _order_base(t)
+    if rank == 2:
+        if t is complex:
+            real, imag = value.real, value.imag
+        else:
+            real, imag = value, 0
+        if real != real or imag != imag:
+            return (2, _INFINITY, _INFINITY, 4)     # NaN sorts after every number
+        return (2, real, imag, _NUMBER_TYPE_ORDER[t])
+    if rank == 3 or rank == 4:
+        return (rank, value)
+    if rank == 5:
+        return (5, tuple(map(_total_order_key, value)))
+    if rank == 6:
+        return (6, sorted(map(_total_order_key, value)))
+    if rank == 0:
+        return (0,)
+    return (_OTHER_RANK, t.__qualname__, repr(value))
+
+
+def _order_base(t: type) -> tuple:
+    """ (builtin base, rank) for a type not in _ORDER_RANKS, found through its MRO. """
+    for base in t.__mro__:
+        if base in _ORDER_RANKS:
+            return base, _ORDER_RANKS[base]
+    return t, _OTHER_RANK
+
+
+def _sorted_total(values: Iterable) -> list:
+    """ sorted(values) in the total order; plain sorted() when all are str or all are int. """
+    kinds = set(map(type, values))
+    if len(kinds) == 1 and kinds <= _NATIVELY_ORDERED:
+        return sorted(values)
+    return sorted(values, key=_total_order_key)
+
+
+# Object to JSON encoder used by pyon_to_json
+
+_JSON_BOOLS = {True: 'true', False: 'false'}
+_SET_ORDERS = ('iterated', 'sorted')
+
+
+def _json_float(o: float) -> str:
+    """ JSON text for a float, as json.dumps writes it. """
+    if o != o:
+        return 'NaN'
+    if o == _INFINITY:
+        return 'Infinity'
+    if o == -_INFINITY:
+        return '-Infinity'
+    return float.__repr__(o)
+
+
+def _json_null(o: None) -> str:
+    return 'null'
+
+
+def _json_qualname(o: Any) -> str:
+    """ A function or class, written as its module-qualified name. """
+    return _encode_json_string(f"{o.__module__}.{o.__qualname__}")
+
+
+class PyonJsonEncoder:
+    """
+    Reusable encoder from PYON-compatible objects to compact JSON text.
+
+    Each value is dispatched on its exact type through dicts of handlers that write
+    JSON text directly, so no JSON-ready copy of the object is built first. A type
+    not in the dicts is resolved once through its MRO (so dict, int, str, etc.
+    subclasses work) and cached under the exact type.
+
+    Dict keys are stringified with str(); keys that then collide (1 and '1') keep
+    the first position and the last value, as in a dict. Tuples, sets and frozensets
+    become arrays. Functions and classes are written as their module-qualified names.
+
+    Sets have no insertion order to preserve, so set_order picks between the order
+    in which the set iterates ('iterated', free; for a set decoded from PYON text
+    that is usually the order written) and a deterministic 'sorted' order. Sorting
+    uses a total order across types (None, numbers and bools by value, strings,
+    bytes, tuples, frozensets, then anything else by type name and repr), so mixed
+    sets sort too.
+
+    More types are added with register(cls, handler). The handler returns a
+    JSON-compatible replacement for the value (a str, list, dict, ...), which is
+    then encoded in turn.
+
+    Args:
+        handlers: optional {type: handler} to register up front.
+        set_order: 'iterated' or 'sorted'.
+
+    Raises:
+        ValueError: If set_order is not one of the above.
+    """
+
+    def __init__(self, handlers: Optional[dict]=None, set_order: str='iterated'):
+        if set_order not in _SET_ORDERS:
+            raise ValueError(f"set_order must be 'iterated' or 'sorted', not {set_order!r}")
+        self.set_order = set_order
+        # scalars: type -> function returning the JSON text of a value
+        self._text_handlers = {
+            str: _encode_json_string,
+            int: int.__repr__,
+            float: _json_float,
+            bool: _JSON_BOOLS.__getitem__,
+            type(None): _json_null,
+            types.FunctionType: _json_qualname,
+            type: _json_qualname,
+        }
+        # containers and registered types: type -> method appending to the output
+        self._handlers = {
+            dict: self._emit_dict,
+            list: self._emit_array,
+            tuple: self._emit_array,
+            set: self._emit_set,
+            frozenset: self._emit_set,
+        }
+        self._text = dict(self._text_handlers)
+        self._dispatch = dict(self._handlers)
+        for cls, handler in (handlers or {}).items():
+            self.register(cls, handler)
+
+    def register(self, cls: type, handler) -> None:
+        """
+        Encode instances of cls (and its subclasses without a handler of their own)
+        as the JSON encoding of handler(value).
+        """
+        self._text_handlers.pop(cls, None)
+        self._handlers[cls] = functools.partial(self._emit_converted, handler)
+        # drop lookups cached through the MRO; they may now resolve differently.
+        self._text = dict(self._text_handlers)
+        self._dispatch = dict(self._handlers)
+
+    def encode(self, obj: Any) -> str:
+        """
+        Encode obj as JSON text.
+
+        Raises:
+            TypeError: If unsupported types are encountered.
+            ValueError: If obj contains itself.
+        """
+        out = []
+        self._emit(obj, out, set())
+        return ''.join(out)
+
+    def _emit(self, o: Any, out: list, markers: set) -> None:
+        t = type(o)
+        to_text = self._text.get(t)
+        if to_text is not None:
+            out.append(to_text(o))
+            return
+        emit = self._dispatch.get(t)
+        if emit is None:
+            self._resolve(t)
+            return self._emit(o, out, markers)
+        emit(o, out, markers)
+
+    def _resolve(self, cls: type) -> None:
+        """ Find the handler for cls through its MRO and cache it under cls. """
+        for base in cls.__mro__[1:]:
+            if base in self._handlers:
+                self._dispatch[cls] = self._handlers[base]
+                return
+            if base in self._text_handlers:
+                self._text[cls] = self._text_handlers[base]
+                return
+        raise TypeError(f"Unsupported type: {cls}")
+
+    def _emit_converted(self, handler, o: Any, out: list, markers: set) -> None:
+        self._emit(handler(o), out, markers)
+
+    def _emit_array(self, o: Union[list, tuple, set, frozenset], out: list, markers: set) -> None:
+        if not o:
+            out.append('[]')
+            return
+        if id(o) in markers:
+            raise ValueError("Circular reference detected")
+        markers.add(id(o))
+        text = self._text
+        append = out.append
+        append('[')
+        first = True
+        for v in o:
+            if first:
+                first = False
+            else:
+                append(',')
+            to_text = text.get(type(v))
+            if to_text is not None:
+                append(to_text(v))
+            else:
+                self._emit(v, out, markers)
+        append(']')
+        markers.discard(id(o))
+
+    def _emit_set(self, o: Union[set, frozenset], out: list, markers: set) -> None:
+        if self.set_order == 'sorted':
+            o = _sorted_total(o)
+        self._emit_array(o, out, markers)
+
+    def _emit_dict(self, o: dict, out: list, markers: set) -> None:
+        if not o:
+            out.append('{}')
+            return
+        if id(o) in markers:
+            raise ValueError("Circular reference detected")
+        markers.add(id(o))
+        out.append('{')
+        start = len(out)
+        done = self._emit_items(o.items(), out, markers)
+        if done < len(o):
+            # a non-str key: stringify all keys, merging any that collide as a dict would.
+            items = {str(k): v for k, v in o.items()}
+            if len(items) < len(o):
+                del out[start:]
+                done = 0
+            elif done:
+                out.append(',')
+            self._emit_items(itertools.islice(items.items(), done, None), out, markers)
+        out.append('}')
+        markers.discard(id(o))
+
+    def _emit_items(self, items: Iterable, out: list, markers: set) -> int:
+        """ Emit key:value pairs up to the first non-str key. Returns the count emitted. """
+        text = self._text
+        append = out.append
+        count = 0
+        for k, v in items:
+            if type(k) is not str:
+                break
+            if count:
+                append(',')
+            append(_encode_json_string(k))
+            append(':')
+            to_text = text.get(type(v))
+            if to_text is not None:
+                append(to_text(v))
+            else:
+                self._emit(v, out, markers)
+            count += 1
+        return count
+
+
+_json_encoders = {set_order: PyonJsonEncoder(set_order=set_order) for set_order in _SET_ORDERS}
+
+
+def pyon_decode_row(
+        row: List[str],
+        cache: Optional['PyonDecodeCache']=None,
+        errors: Union[None, str, list]=None,
+        row_index: Optional[int]=None,
+        ) -> List[Any]:
+    """
+    Decode an entire CSV row with PYON-encoded strings. Identifies objects when strings start/end with {}, [], ()
+
+    Args:
+        row: A list of strings (as delivered by csv.reader).
+        cache: optional PyonDecodeCache, to decode repeated cell strings only once.
+        errors: what to do with a cell that looks like PYON but does not decode. By default
+            it is left as a string. With 'raise', a PyonDecodeError giving the cell's index
+            is raised. With a list, a PyonDecodeError for every such cell is appended to it
+            (the cells are left as strings), so all bad cells are reported in one pass.
+        row_index: index of the row, recorded in the errors.
+
+    Returns:
+        A list where PYON strings are decoded into Python objects, and other strings are left as-is.
+
+    Raises:
+        PyonDecodeError: If errors is 'raise' and a cell does not decode.
+        ValueError: If errors is not None, 'raise' or a list.
+    """
+    _check_errors_arg(errors)
+    if _stats is not None:
+        return _stats.measure('pyon_decode_row', row, _pyon_decode_row, row, cache, errors, row_index)
+    return _pyon_decode_row(row, cache, errors, row_index)
+
+
+def _pyon_decode_row(row: List[str], cache: Optional['PyonDecodeCache'], errors: Union[None, str, list],
+                     row_index: Optional[int]) -> List[Any]:
+    """ pyon_decode_row() without instrumentation. """
+    decode = pyon_decode if cache is None else cache.decode
+    if errors is None:
+        return [_decode_cell(cell, decode) for cell in row]
+    return [_decode_cell_checked(cell, decode, errors, row_index, i) for i, cell in enumerate(row)]
+
+
+def pyon_decode_rows(
+        rows: Iterable[List[str]],
+        columns: Optional[Iterable[int]]=None,
+        block_size: int=10000,
+        cache: Optional['PyonDecodeCache']=None,
+        errors: Union[None, str, list]=None,
+        ) -> Iterator[List[Any]]:
+    """
+    Decode many CSV rows (as delivered by csv.reader) column by column.
+
+    Which columns hold PYON is decided once, not per cell: from `columns` if given,
+    otherwise from the first block of rows, where a column with any cell that looks
+    like PYON ({...}, [...], (...)) is a PYON column. Cells in the other columns are
+    passed through without being examined; cells in PYON columns are decoded as by
+    pyon_decode_row. Rows are processed in blocks, each transposed into columns so
+    the pass-through columns cost no per-cell Python work.
+
+    Args:
+        rows: iterable of rows (lists of strings).
+        columns: optional indices of the PYON columns, skipping detection.
+        block_size: number of rows decoded per batch.
+        cache: optional PyonDecodeCache, to decode repeated cell strings only once.
+        errors: None, 'raise' or a list, as for pyon_decode_row; errors record the
+            index of the row in rows.
+
+    Yields:
+        List[Any]: decoded rows, in input order.
+
+    Raises:
+        PyonDecodeError: If errors is 'raise' and a cell does not decode.
+        ValueError: If errors is not None, 'raise' or a list (raised by the call,
+            before any row is read).
+    """
+    _check_errors_arg(errors)
+    return _iter_decode_rows(rows, columns, block_size, cache, errors)
+
+
+def _iter_decode_rows(rows: Iterable[List[str]], columns: Optional[Iterable[int]], block_size: int,
+                      cache: Optional['PyonDecodeCache'], errors: Union[None, str, list]) -> Iterator[List[Any]]:
+    """ pyon_decode_rows() once its arguments are checked. """
+    rows = iter(rows)
+    pyon_columns = None if columns is None else sorted(set(columns))
+    decode_cell = _decode_cell if cache is None else functools.partial(_decode_cell, decode=cache.decode)
+    decode = pyon_decode if cache is None else cache.decode
+    row_index = 0
+    while True:
+        block = list(itertools.islice(rows, block_size))
+        if not block:
+            return
+        if pyon_columns is None:
+            pyon_columns = _detect_pyon_columns(block)
+
+        if errors is not None:
+            for row in block:
+                row = list(row)
+                for i in pyon_columns:
+                    if i < len(row):
+                        row[i] = _decode_cell_checked(row[i], decode, errors, row_index, i)
+                row_index += 1
+                yield row
+            continue
+
+        width = len(block[0])
+        ragged = any(len(row) != width for row in block)
+
+        if ragged or not width:
+            # rows of unequal length, or only empty rows, which zip() would lose
+            for row in block:
+                row = list(row)
+                for i in pyon_columns:
+                    if i < len(row):
+                        row[i] = decode_cell(row[i])
+                yield row
+            continue
+
+        table = list(zip(*block))
+        for i in pyon_columns:
+            if i < width:
+                table[i] = list(map(decode_cell, table[i]))
+        yield from map(list, zip(*table))
+
+
+def pyon_decode_rows_parallel(
+        rows: Iterable[List[str]],
+        columns: Optional[Iterable[int]]=None,
+        chunk_size: int=10000,
+        max_workers: Optional[int]=None,
+        executor: Optional['concurrent.futures.Executor']=None,
+        max_pending: Optional[int]=None,
+        ) -> Iterator[List[Any]]:
+    """
+    Decode CSV rows like pyon_decode_rows, sharing the work across processes.
+
+    Rows are sent to a ProcessPoolExecutor in chunks of chunk_size rows, and the
+    decoded rows are yielded in their original order. PYON columns are detected
+    once, from the first chunk, unless given. At most max_pending chunks are in
+    flight, so rows are read from the input only as fast as they are decoded.
+
+    Args:
+        rows: iterable of rows (lists of strings).
+        columns: optional indices of the PYON columns, skipping detection.
+        chunk_size: number of rows per task sent to a worker.
+        max_workers: number of worker processes (default: os.cpu_count()).
+        executor: optional existing executor to use instead of creating a pool;
+            it is left running afterwards.
+        max_pending: maximum number of chunks submitted and not yet yielded
+            (default: two per worker, max_workers or os.cpu_count()).
+
+    Yields:
+        List[Any]: decoded rows, in input order.
+    """
+    rows = iter(rows)
+    first_chunk = list(itertools.islice(rows, chunk_size))
+    if not first_chunk:
+        return
+    pyon_columns = _detect_pyon_columns(first_chunk) if columns is None else sorted(set(columns))
+    chunks = itertools.chain([first_chunk], iter(lambda: list(itertools.islice(rows, chunk_size)), []))
+
+    own_executor = executor is None
+    if own_executor:
+        import concurrent.futures
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    if max_pending is None:
+        max_pending = 2 * (max_workers or os.cpu_count() or 1)
+    pending = collections.deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(_decode_rows_chunk, chunk, pyon_columns))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+def _decode_rows_chunk(rows: List[List[str]], columns: List[int]) -> List[List[Any]]:
+    """ Worker task for pyon_decode_rows_parallel. """
+    return list(pyon_decode_rows(rows, columns, block_size=len(rows)))
+
+
+def _detect_pyon_columns(block: List[List[str]]) -> List[int]:
+    """ Indices of the columns in which some cell of block looks like PYON. """
+    return [
+        i for i, column in enumerate(itertools.zip_longest(*block, fillvalue=''))
+        if any(map(_looks_like_pyon, column))
+    ]
+
+
+_PYON_CELL_ENDS = frozenset(['{}', '[]', '()'])
+
+
+def _looks_like_pyon(cell: Any) -> bool:
+    """ True if cell is a str that starts/ends with {}, [] or (). """
+    return isinstance(cell, str) and cell[:1] + cell[-1:] in _PYON_CELL_ENDS
+
+
+def _decode_cell(cell: Any, decode=pyon_decode) -> Any:
+    """ Decode one CSV cell if it looks like PYON; leave it as-is otherwise or if invalid. """
+    if not (isinstance(cell, str) and cell[:1] + cell[-1:] in _PYON_CELL_ENDS):
+        return cell  # Leave non-PYON strings as-is
+    try:
+        return decode(cell)
+    except ValueError:
+        if _stats is not None:
+            _stats.count('pyon_decode_row.kept_string')
+        return cell  # Leave invalid PYON as string
+
+
+def _check_errors_arg(errors: Union[None, str, list]) -> None:
+    """ Reject an errors argument other than None, 'raise' or a list. """
+    if not (errors is None or errors == 'raise' or isinstance(errors, list)):
+        raise ValueError(f"errors must be None, 'raise' or a list, not {errors!r}")
+
+
+def _decode_cell_checked(cell: Any, decode, errors: Union[str, list], row_index: Optional[int], col_index: int) -> Any:
+    """ _decode_cell, reporting invalid PYON as pyon_decode_row's errors argument asks. """
+    if not (isinstance(cell, str) and cell[:1] + cell[-1:] in _PYON_CELL_ENDS):
+        return cell
+    try:
+        return decode(cell)
+    except ValueError as e:
+        if isinstance(e, PyonDecodeError):
+            error = PyonDecodeError(e.msg, e.doc, e.pos, e.lineno, e.colno, row_index, col_index)
+        else:
+            error = PyonDecodeError(str(e), cell, row_index=row_index, col_index=col_index)
+        if errors == 'raise':
+            raise error
+        if _stats is not None:
+            _stats.count('pyon_decode_row.kept_string')
+        errors.append(error)
+        return cell
+
+
+class PyonDecodeCache:
+    """
+    Bounded LRU cache of decoded PYON cell strings, for CSV columns in which the
+    same values (status dicts, small tuples, tag lists) repeat many times.
+
+    Pass it as pyon_decode_row(row, cache=...) or pyon_decode_rows(rows, cache=...),
+    or call cache.decode(pyon_str) directly.
+
+    Decoded values are shared by every hit, so by default a mutable result (one
+    containing a list, dict or set) is deep-copied on return; immutable results
+    are returned as-is. With frozen=True, results are instead converted once to
+    immutable equivalents (list -> tuple, set -> frozenset, dict -> read-only
+    types.MappingProxyType) and always returned without copying.
+
+    Args:
+        maxsize: maximum number of cached cell strings.
+        maxbytes: maximum total size in UTF-8 bytes of the cached cell strings; larger cells
+            are not cached.
+        frozen: return immutable, shared results instead of copies.
+    """
+
+    def __init__(self, maxsize: int=4096, maxbytes: int=1 << 24, frozen: bool=False):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.frozen = frozen
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = collections.OrderedDict()   # pyon_str -> (value, needs_copy, UTF-8 size)
+
+    def decode(self, pyon_str: str) -> Any:
+        """ pyon_decode(pyon_str), answered from the cache when possible. """
+        entry = self._entries.get(pyon_str)
+        if entry is not None:
+            self.hits += 1
+            if _stats is not None:
+                _stats.count('cache.hits')
+            self._entries.move_to_end(pyon_str)
+            value, needs_copy, _ = entry
+            return _copy_decoded(value) if needs_copy else value
+
+        self.misses += 1
+        if _stats is not None:
+            _stats.count('cache.misses')
+        value = pyon_decode(pyon_str)
+        size = _text_size(pyon_str)
+        if size > self.maxbytes or self.maxsize <= 0:
+            return value
+
+        if self.frozen:
+            value = _freeze_decoded(value)
+            needs_copy = False
+        else:
+            needs_copy = not _is_immutable(value)
+        self._entries[pyon_str] = (value, needs_copy, size)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or self._bytes > self.maxbytes:
+            _, (_, _, old_size) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+        return _copy_decoded(value) if needs_copy else value
+
+    def clear(self) -> None:
+        """ Drop all entries and reset the statistics. """
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """ Hit/miss statistics and current size, for tuning maxsize and maxbytes. """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'bytes': self._bytes,
+            'maxsize': self.maxsize,
+            'maxbytes': self.maxbytes,
+        }
+
+
+_IMMUTABLE_TYPES = _ATOMIC_TYPES | {frozenset}
+
+
+def _is_immutable(obj: Any) -> bool:
+    """ True if a decoded value contains no list, dict or set at any depth. """
+    t = type(obj)
+    if t in _IMMUTABLE_TYPES:
+        return True
+    if t is tuple:
+        return all(map(_is_immutable, obj))
+    return False
+
+
+def _copy_decoded(obj: Any) -> Any:
+    """ Deep copy of a decoded value; immutable parts are shared. """
+    t = type(obj)
+    if t is list:
+        return [v if type(v) in _ATOMIC_TYPES else _copy_decoded(v) for v in obj]
+    if t is dict:
+        return {k: v if type(v) in _ATOMIC_TYPES else _copy_decoded(v) for k, v in obj.items()}
+    if t is set:
+        return set(obj)     # elements are hashable, hence not lists, dicts or sets
+    if t is tuple and not _is_immutable(obj):
+        return tuple([_copy_decoded(v) for v in obj])
+    return obj
+
+
+def _freeze_decoded(obj: Any) -> Any:
+    """ Immutable equivalent of a decoded value: list -> tuple, set -> frozenset, dict -> MappingProxyType. """
+    t = type(obj)
+    if t is list or t is tuple:
+        return tuple([_freeze_decoded(v) for v in obj])
+    if t is dict:
+        return types.MappingProxyType({k: _freeze_decoded(v) for k, v in obj.items()})
+    if t is set:
+        return frozenset(obj)
+    return obj
+
+
+def sort_dict_keys(obj: Any, in_place: bool=False) -> Any:
+    """
+    Recursively sort dictionary keys in a Python object.
+
+    Keys are sorted in a total order across types (None, numbers and bools by
+    value, strings, bytes, tuples, frozensets, then anything else by type name and
+    repr), so a dict mixing keys such as 1, 'set' and (1, 2) sorts instead of raising TypeError.
+    Subclasses such as IntEnum and StrEnum sort with their builtin base type.
+    Dicts whose keys are all str or all int use plain sorted().
+    The structure is walked with an explicit stack, so deep nesting does not hit
+    the recursion limit.
+
+    Args:
+        obj: The input object, which can be a dictionary, list, tuple, or other types.
+        in_place: if True, reorder the dicts in obj where they are and return obj
+            itself; no copy is made. Use this only on data you own.
+
+    Returns:
+        The input object with dictionary keys sorted recursively.
+
+    Raises:
+        ValueError: If obj contains itself (copying only).
+    """
+    if not isinstance(obj, (dict, list, tuple)):
+        # Return object as-is if not a container
+        return obj
+    if in_place:
+        _sort_dict_keys_in_place(obj)
+        return obj
+
+    # Each frame: [container, sorted keys (dicts only), iterator over the values, converted values]
+    stack = [_open_sort_frame(obj)]
+    active = {id(obj)}
+    while True:
+        frame = stack[-1]
+        converted = frame[3]
+        for value in frame[2]:
+            if isinstance(value, (dict, list, tuple)):
+                if id(value) in active:
+                    raise ValueError("Circular reference detected")
+                active.add(id(value))
+                stack.append(_open_sort_frame(value))
+                break
+            converted.append(value)
+        else:
+            stack.pop()
+            container, keys = frame[0], frame[1]
+            active.discard(id(container))
+            if keys is not None:
+                result = dict(zip(keys, converted))
+            elif isinstance(container, tuple):
+                result = tuple(converted)
+            else:
+                result = converted
+            if not stack:
+                return result
+            stack[-1][3].append(result)
+
+
+def _open_sort_frame(container: Union[dict, list, tuple]) -> list:
+    if isinstance(container, dict):
+        keys = _sorted_total(container)
+        return [container, keys, map(container.__getitem__, keys), []]
+    return [container, None, iter(container), []]
+
+
+def _sort_dict_keys_in_place(obj: Union[dict, list, tuple]) -> None:
+    """ Reorder every dict reachable from obj into sorted key order, without copying. """
+    seen = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, dict):
+            keys = _sorted_total(o)
+            if keys != list(o):
+                values = [o[k] for k in keys]
+                o.clear()
+                o.update(zip(keys, values))
+            values = o.values()
+        else:
+            values = o
+        stack.extend(v for v in values if isinstance(v, (dict, list, tuple)))
+
+
+def normalize_pyon(pyon_str: str) -> str:
+    """
+    Normalize a PYON string by decoding it, sorting dictionary keys recursively, 
+    and re-encoding it into a consistent PYON format.
+
+    Args:
+        pyon_str: A string containing PYON-encoded data.
+
+    Returns:
+        str: A normalized PYON string with sorted dictionary keys.
+
+    Notes:
+        - If the input string cannot be decoded as PYON, it is returned unchanged.
+    """
+    try:
+        # Safely decode the PYON string into a Python object
+        pyon_obj = pyon_decode(pyon_str)
+        # Re-encode into a consistent PYON string, sorting dictionary keys as it is written
+        return pyon_encode(pyon_obj, sort_keys=True)
+        
+    except (ValueError, SyntaxError):
+        # Return the original string if decoding fails
+        return pyon_str
+
+
+def normalize_pyon_many(
+        pyon_strs: Iterable[str],
+        max_workers: Optional[int]=None,
+        chunk_size: int=10000,
+        executor: Optional['concurrent.futures.Executor']=None,
+        ) -> List[str]:
+    """
+    Normalize many PYON strings, such as a CSV column, with normalize_pyon.
+
+    Each distinct string is normalized only once, so columns with many repeated
+    values cost little more than their distinct values. The results are returned
+    in input order.
+
+    Args:
+        pyon_strs: iterable of PYON strings.
+        max_workers: if given, distinct strings are normalized by a ProcessPoolExecutor
+            with this many workers, in chunks of chunk_size. The pool is only used when
+            there is more than one chunk of distinct strings.
+        chunk_size: number of distinct strings per task sent to a worker.
+        executor: optional existing executor to use instead of creating a pool;
+            it is left running afterwards.
+
+    Returns:
+        List[str]: normalized strings, in input order.
+    """
+    pyon_strs = list(pyon_strs)
+    distinct = list(dict.fromkeys(pyon_strs))
+    if (max_workers is None and executor is None) or len(distinct) <= chunk_size:
+        normalized = dict(zip(distinct, map(normalize_pyon, distinct)))
+        return list(map(normalized.__getitem__, pyon_strs))
+
+    chunks = [distinct[i:i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+    own_executor = executor is None
+    if own_executor:
+        import concurrent.futures
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        results = itertools.chain.from_iterable(executor.map(_normalize_chunk, chunks))
+        normalized = dict(zip(distinct, results))
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+    return list(map(normalized.__getitem__, pyon_strs))
+
+
+def _normalize_chunk(pyon_strs: List[str]) -> List[str]:
+    """ Worker task for normalize_pyon_many. """
+    return list(map(normalize_pyon, pyon_strs))
+
+
+def pyon_hash(obj: Any, algorithm: str='sha256') -> str:
+    """
+    Content fingerprint of a Python object: the hex digest of its canonical PYON,
+    pyon_encode(obj, canonical=True) as UTF-8 bytes.
+
+    Values with the same canonical text give the same digest, whatever their dict
+    or set ordering, in any process. The canonical text is fed to the hash chunk
+    by chunk as the object is walked, so the whole string is never built.
+
+    Two limits follow from hashing the text rather than the value:
+
+    - Values that compare equal across types hash differently: 1, 1.0 and True are
+      written as '1', '1.0' and 'True', so pyon_hash(1) != pyon_hash(1.0), and
+      {1} and {1.0} differ too. Convert numbers to one type first if they should match.
+    - Strings are written with repr(), which escapes characters the running Python
+      considers unprintable. That set follows the interpreter's Unicode tables, so
+      digests of strings holding newly assigned characters can differ between
+      Python versions. Compare digests made by the same Python version.
+
+    Args:
+        obj: The Python object to fingerprint.
+        algorithm: any hashlib algorithm name.
+
+    Returns:
+        str: hexadecimal digest.
+    """
+    import hashlib
+    digest = hashlib.new(algorithm)
+    update = digest.update
+    for chunk in iterencode(obj, canonical=True):
+        update(chunk.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def pyon_hash_str(pyon_str: str, algorithm: str='sha256') -> str:
+    """
+    Content fingerprint of a PYON string: pyon_hash() of its decoded value, so
+    strings that differ only in spacing, quoting or key order hash the same.
+
+    Args:
+        pyon_str: The PYON string (or UTF-8 bytes-like buffer) to fingerprint.
+        algorithm: any hashlib algorithm name.
+
+    Returns:
+        str: hexadecimal digest.
+
+    Raises:
+        ValueError: If decoding fails.
+    """
+    return pyon_hash(pyon_decode(pyon_str), algorithm)
+
+
+# Newline-delimited PYON (NDPYON): one PYON record per line.
+# The optional index is a sidecar file (conventionally the data path + '.idx')
+# holding the byte offset of each record as a little-endian unsigned 64-bit integer,
+# so record n is found by reading 8 bytes at n * 8 and seeking once in the data file.
+
+_NDPYON_OFFSET = struct.Struct('<Q')
+
+
+def ndpyon_dump(records: Iterable[Any], fp: TextIO, index_fp: Optional[BinaryIO]=None, compact: bool=False,
+                start_offset: Optional[int]=None) -> int:
+    """
+    Write records to a text file as NDPYON, one pyon_encode()'d record per line.
+
+    To append records to an existing file and its index, open the data file with
+    mode 'a' and the index with mode 'ab': offsets then continue from the end of
+    the existing data.
+
+    Args:
+        records: iterable of Python objects to write.
+        fp: text file-like object to write to. Offsets recorded in index_fp assume it
+            writes UTF-8 without newline translation (open with encoding='utf-8', newline='').
+        index_fp: optional binary file-like object receiving the offset index.
+        compact: if True, encode records without spaces after ',' and ':'.
+        start_offset: byte offset in the data file of the first record written. By
+            default, the current position of fp (fp.tell()), or 0 if fp cannot tell.
+
+    Returns:
+        int: number of records written.
+
+    Raises:
+        ValueError: If a record's PYON form spans more than one line.
+    """
+    write = fp.write
+    offset = start_offset
+    if offset is None:
+        offset = 0
+        if index_fp is not None:
+            try:
+                offset = fp.tell()
+            except (AttributeError, OSError):
+                pass
+    count = 0
+    for record in records:
+        line = pyon_encode(record, compact=compact)
+        if '\n' in line or '\r' in line:
+            raise ValueError(f"Record {count} does not encode to a single line")
+        line += '\n'
+        write(line)
+        if index_fp is not None:
+            index_fp.write(_NDPYON_OFFSET.pack(offset))
+            offset += len(line.encode('utf-8'))
+        count += 1
+    return count
+
+
+def ndpyon_load(fp: Union[TextIO, BinaryIO]) -> Iterator[Any]:
+    """
+    Lazily read NDPYON records, decoding one line at a time. Blank lines are skipped.
+
+    Args:
+        fp: text or binary (UTF-8) file-like object, or any iterable of lines.
+
+    Yields:
+        Any: decoded records, in file order.
+
+    Raises:
+        ValueError: If a line cannot be decoded.
+    """
+    for line in fp:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if line:
+            yield pyon_decode(line)
+
+
+def ndpyon_build_index(fp: BinaryIO, index_fp: BinaryIO) -> int:
+    """
+    Scan an existing NDPYON file and write its record offset index.
+
+    Args:
+        fp: binary file-like object positioned at the start of the data.
+        index_fp: binary file-like object to write the index to.
+
+    Returns:
+        int: number of records indexed (blank lines are not records).
+    """
+    pack = _NDPYON_OFFSET.pack
+    write = index_fp.write
+    offset = fp.tell()
+    count = 0
+    for line in fp:
+        if line.strip():
+            write(pack(offset))
+            count += 1
+        offset += len(line)
+    return count
+
+
+def ndpyon_read_record(fp: BinaryIO, n: int, index_fp: BinaryIO) -> Any:
+    """
+    Fetch record n of an NDPYON file using its offset index, with a single seek
+    into each file instead of scanning the records before it.
+
+    Args:
+        fp: binary file-like object of the NDPYON data.
+        n: zero-based record number.
+        index_fp: binary file-like object of the offset index.
+
+    Returns:
+        Any: the decoded record.
+
+    Raises:
+        IndexError: If n is outside the index.
+        ValueError: If the record cannot be decoded.
+    """
+    if n < 0:
+        raise IndexError(f"NDPYON record {n} out of range")
+    index_fp.seek(n * _NDPYON_OFFSET.size)
+    entry = index_fp.read(_NDPYON_OFFSET.size)
+    if len(entry) < _NDPYON_OFFSET.size:
+        raise IndexError(f"NDPYON record {n} out of range")
+    fp.seek(_NDPYON_OFFSET.unpack(entry)[0])
+    return pyon_decode(fp.readline().decode('utf-8').strip())
+
+
+
+# Example of Usage
+if __name__ == "__main__":
+    # Encode and Decode Example
+    data = {"key": True, "list": [1, 2, 3], "nested": {"a": 1, "b": 2}}
+    encoded = pyon_encode(data)
+    print("Encoded PYON:", encoded)
+
+    decoded = pyon_decode(encoded)
+    print("Decoded PYON:", decoded)
+
+    # Remove Spaces Example
+    compact = remove_spaces(encoded)
+    print("Compact PYON:", compact)
+
+    # Convert to JSON Example
+    json_data = pyon_to_json(data)
+    print("JSON Data:", json_data)
@@ -0,0 +1,788 @@
+"""
+test_pyontools.py
+
+Tests for pyontools, runnable with either of:
+    python -m unittest test_pyontools
+    python -m pytest test_pyontools.py
+
+pyon_decode is checked against ast.literal_eval, which defines what PYON text
+means: on edge cases and on randomized documents, both must give the same value
+or both must reject the text (except empty text, which pyon_decode returns as is).
+"""
+
+import ast
+import collections
+import concurrent.futures
+import enum
+import hashlib
+import io
+import json
+import os
+import pprint
+import random
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+import warnings
+
+from pyontools import (
+    PyonDecodeCache,
+    PyonDecodeError,
+    PyonJsonEncoder,
+    PyonStats,
+    disable_stats,
+    enable_stats,
+    iterdecode,
+    iterencode,
+    json_to_pyon,
+    ndpyon_build_index,
+    ndpyon_dump,
+    ndpyon_load,
+    ndpyon_read_record,
+    normalize_pyon,
+    normalize_pyon_many,
+    pyon_decode,
+    pyon_decode_row,
+    pyon_decode_rows,
+    pyon_decode_rows_parallel,
+    pyon_dump,
+    pyon_encode,
+    pyon_hash,
+    pyon_hash_str,
+    pyon_load,
+    pyon_str_to_json,
+    pyon_to_json,
+    sort_dict_keys,
+)
+
+
+def _literal_eval(text):
+    """ ('ok', value) or ('error', None) as ast.literal_eval decodes text. """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return 'ok', ast.literal_eval(text)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return 'error', None
+
+
+def _pyon_decode(text):
+    """ ('ok', value) or ('error', None) as pyon_decode decodes text. """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return 'ok', pyon_decode(text)
+    except ValueError:
+        return 'error', None
+
+
+class PyonDecodeMatchesLiteralEvalTest(unittest.TestCase):
+
+    EDGE_CASES = [
+        # strings: quotes, triple quotes, prefixes, escapes and implicit concatenation
+        "''", '""', "'it''s'", "'''x''y'''", '"""a"b"""', "'''a\nb'''", "'''x'''", "''''''",
+        "'a' 'b'", "('a'\n 'b')", "['a' \"b\", 'c']", "r'\\d+'", "u'x'", "b'\\xff\\x00'", "rb'\\n'",
+        "'\\x41\\101\\u0042\\N{BULLET}'", "'\\q'", "'\\777'", "'\\\n'", "'tab\\tnew\\nline'",
+        "'é ü'", "'\\ud800'", "'a\\'b'", "'日\\n本'", "'\\\\日'", "'😀\\t\\x41'", "'\\N{BULLET}日'",
+        "['日\\n', '\\t\\x00']", "'\x00日'", "'日\ud800'", "['\\n\\n\\n\\n\\n\\n\\n\\n\\n日', '\\t']",
+        # numbers
+        "0", "-0", "+3", "1_000", "0x1F", "0o17", "0b101", "1e3", "1E-3", "1.", ".5", "-0.0",
+        "1e400", "-1e400", "1j", "1+2j", "-1.5-2.5j", "(1)", "-(1)", "007", "1__0", "0x", "1e",
+        "[\u0661\u0662]", "{\u0661: \uff12}", "\u0661", "[1.\u0662]", "[1e\u0662]",
+        # containers
+        "()", "(1,)", "(1)", "[]", "[1, 2,]", "{}", "{'a': [1, {2}]}", "{1: 2, 1: 3}", "set()",
+        "set( )", "{1, 2, 2}", "((1, 2), [3, (4,)])", "[1, [2, [3, [4]]]]", "{(1, 2): None}",
+        "[True, False, None]",
+        # comments and whitespace
+        "[1, # one\n 2]", "# lead\n[1]", "[1]  # trail", "  [1]", "[1]\n", "[\n1,\n2\n]",
+        "{'a': 1  # c\n}", "'#not a comment'",
+        # not PYON
+        "'''x", "'x", "[1,,2]", "[1", "1 +", "x", "set(1)", "set([1])", "frozenset()",
+        "{1: 2, **{}}", "[*[1]]", "f'x'", "None()", "1 if 1 else 2", "{'a' 1}", "[1] [2]",
+    ]
+
+    def assert_same(self, text):
+        if not text:
+            self.assertEqual(pyon_decode(text), text)
+            return
+        expected = _literal_eval(text)
+        got = _pyon_decode(text)
+        self.assertEqual(got[0], expected[0], f"accepted differently: {text!r}")
+        if expected[0] == 'ok':
+            self.assertEqual(repr(got[1]), repr(expected[1]), f"decoded differently: {text!r}")
+
+    def test_edge_cases(self):
+        for text in self.EDGE_CASES:
+            with self.subTest(text=text):
+                self.assert_same(text)
+
+    def test_randomized_documents(self):
+        rng = random.Random(20240101)
+        for _ in range(2000):
+            text = _random_pyon(rng)
+            with self.subTest(text=text):
+                self.assert_same(text)
+
+    def test_randomized_values_round_trip(self):
+        rng = random.Random(7)
+        for _ in range(1000):
+            value = _random_value(rng)
+            with self.subTest(value=value):
+                self.assertEqual(repr(pyon_decode(repr(value))), repr(value))
+
+    def test_error_is_pyon_decode_error(self):
+        with self.assertRaises(PyonDecodeError):
+            pyon_decode("[1,,2]")
+
+    def test_integer_over_digit_limit(self):
+        limit = getattr(sys, 'get_int_max_str_digits', lambda: 0)()
+        if not limit:
+            self.skipTest("no limit on int digits")
+        for text in ('9' * (limit + 1), '[1, ' + '9' * (limit + 1) + ']'):
+            with self.assertRaises(PyonDecodeError):
+                pyon_decode(text)
+
+
+_WORDS = ['a', "it's", 'say "hi"', 'tab\there', 'line\nbreak', 'ünï', 'back\\slash', '\x00', '#', '']
+
+
+def _random_value(rng, depth=0):
+    kind = rng.randrange(9 if depth < 4 else 5)
+    if kind == 0:
+        return rng.choice([0, -1, 10 ** 30, True, False, None])
+    if kind == 1:
+        return rng.choice([0.0, -0.0, 1.5, 1e-7, 1e300, complex(1, -2)])
+    if kind == 2:
+        return rng.choice(_WORDS) + rng.choice(_WORDS)
+    if kind == 3:
+        return bytes(rng.randrange(256) for _ in range(rng.randrange(4)))
+    if kind == 4:
+        return rng.randint(-10 ** 6, 10 ** 6)
+    n = rng.randrange(4)
+    if kind == 5:
+        return [_random_value(rng, depth + 1) for _ in range(n)]
+    if kind == 6:
+        return tuple(_random_value(rng, depth + 1) for _ in range(n))
+    if kind == 7:
+        return {rng.choice(_WORDS): _random_value(rng, depth + 1) for _ in range(n)}
+    return {rng.randint(0, 9) for _ in range(n)}
+
+
+def _random_pyon(rng):
+    """ repr() of a random value, then lightly mutated: spacing, comments, quotes, deletions. """
+    text = repr(_random_value(rng))
+    for _ in range(rng.randrange(3)):
+        i = rng.randrange(len(text) + 1)
+        insert = rng.choice([' ', '\n', '  # note\n', ',', "'", '"', "'''", '(', ']', '_', 'j', 'e', '\\'])
+        if rng.random() < 0.3 and text:
+            text = text[:i] + text[i + 1:]
+        else:
+            text = text[:i] + insert + text[i:]
+    return text
+
+
+class PyonLoadMatchesPyonDecodeTest(unittest.TestCase):
+
+    EDGE_CASES = [
+        "[1\\]", "[1, 2\\]", "[1\\\n]", "[1, 2]\\", "(1, 2),", "[1], [2]", "[1],", "{1: 2}, 3", "(1), 2",
+        "[1], , 2", "(1,)\n, (2,)", "[1],\n# c\n", "[1] [2]", "\n False", "  # c\n 1", "# c\n[1]", "  [1]",
+        "['a'\n'b']", "[1, # c\n 2]", "[1 # c\n]", "{1: 2: 3}", "{1, 2: 3}", "([1]), (2)",
+        "[1,\xa02]", "[1,\u20282]", "\xa0[1]", "[1]\xa0", "[\x0b1]", "[1,\x0c2]", "[1]\x0c",
+    ]
+
+    def assert_same(self, text):
+        expected = _pyon_decode(text)
+        for chunk_size in (1, 3, 65536):
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    got = 'ok', pyon_load(io.StringIO(text), chunk_size=chunk_size)
+            except ValueError:
+                got = 'error', None
+            self.assertEqual(got[0], expected[0], f"accepted differently: {text!r}, chunk_size {chunk_size}")
+            self.assertEqual(repr(got[1]), repr(expected[1]), f"decoded differently: {text!r}")
+
+    def test_edge_cases(self):
+        for text in self.EDGE_CASES:
+            with self.subTest(text=text):
+                self.assert_same(text)
+
+    def test_randomized_documents(self):
+        rng = random.Random(6)
+        for _ in range(500):
+            text = _random_pyon(rng)
+            if text.strip():
+                with self.subTest(text=text):
+                    self.assert_same(text)
+
+    def test_iterdecode_rejects_bare_tuple(self):
+        with self.assertRaises(PyonDecodeError):
+            list(iterdecode('[1, 2], [3]'))
+
+
+class LargeBufferTest(unittest.TestCase):
+    """ Buffers over 1 MB are decoded in chunks; they must decode exactly as the same text does. """
+
+    def assert_same(self, text):
+        expected = _pyon_decode(text)
+        got = _pyon_decode(text.encode('utf-8'))
+        self.assertEqual(got[0], expected[0], f"accepted differently: {text[:40]!r}...{text[-40:]!r}")
+        self.assertEqual(repr(got[1]), repr(expected[1]))
+
+    def test_large_buffers(self):
+        items = ', '.join(["'" + 'x' * 200 + "'"] * 6000)
+        for text in ('[' + items + ']', '[' + items + '\\]', '[1], [' + items + ']', '[' + items + '], 2,',
+                     "{'k': [" + items + "], 'ü': ('a'\n'b')}", '(' + items + ')\n, 1', '  # c\n[' + items + ']'):
+            with self.subTest(text=text[:20]):
+                self.assert_same(text)
+
+
+class PyonDecodeRowsTest(unittest.TestCase):
+
+    def test_row_counts(self):
+        cases = [
+            [],
+            [[]],
+            [[], []],
+            [[], [], []],
+            [['1'], [], ['[2]']],
+            [['a', '[1]'], ['b', '[2]'], ['c']],
+            [['[1]', '(2,)']] * 5,
+        ]
+        for rows in cases:
+            for block_size in (1, 2, 3, 10000):
+                with self.subTest(rows=rows, block_size=block_size):
+                    out = list(pyon_decode_rows(rows, block_size=block_size))
+                    self.assertEqual(len(out), len(rows))
+                    out = list(pyon_decode_rows(rows, columns=[0, 1], block_size=block_size))
+                    self.assertEqual(out, [pyon_decode_row(row) for row in rows])
+
+    def test_errors_argument_checked_when_called(self):
+        with self.assertRaises(ValueError):
+            pyon_decode_row(['[1'], errors='ignore')
+        with self.assertRaises(ValueError):
+            pyon_decode_rows([['[1]']], errors='ignore')
+
+    def test_errors_list_collects_bad_cells(self):
+        errors = []
+        out = list(pyon_decode_rows([['[1]', '[2,,]'], ['{]', '(3,)']], errors=errors))
+        self.assertEqual(out, [[[1], '[2,,]'], ['{]', (3,)]])
+        self.assertEqual([(e.row_index, e.col_index) for e in errors], [(0, 1)])
+
+
+class PyonDecodeRowsParallelTest(unittest.TestCase):
+
+    ROWS = [[str(i), repr({'n': i, 'ok': i % 3 == 0}), repr([i] * (i % 4)), 'text %d' % i] for i in range(250)]
+
+    def test_matches_pyon_decode_rows_in_order(self):
+        expected = list(pyon_decode_rows(self.ROWS, columns=[1, 2]))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            for chunk_size, max_pending in ((1, 2), (7, 1), (100, None), (1000, None)):
+                with self.subTest(chunk_size=chunk_size, max_pending=max_pending):
+                    out = pyon_decode_rows_parallel(self.ROWS, chunk_size=chunk_size, executor=executor,
+                                                    max_pending=max_pending)
+                    self.assertEqual(list(out), expected)
+            self.assertEqual(list(pyon_decode_rows_parallel(self.ROWS, columns=[1], executor=executor)),
+                             list(pyon_decode_rows(self.ROWS, columns=[1])))
+            self.assertEqual(list(pyon_decode_rows_parallel([], executor=executor)), [])
+
+    def test_process_pool(self):
+        out = pyon_decode_rows_parallel(self.ROWS, chunk_size=50, max_workers=2)
+        self.assertEqual(list(out), list(pyon_decode_rows(self.ROWS, columns=[1, 2])))
+
+
+class PyonDecodeCacheTest(unittest.TestCase):
+
+    def test_results_match_pyon_decode(self):
+        cache = PyonDecodeCache(maxsize=3)
+        cells = ["{'ok': [1]}", '(1, 2)', "{'a'}", '[[]]', "{'ok': [1]}", '(1, 2)', "'x'"] * 3
+        for cell in cells:
+            self.assertEqual(repr(cache.decode(cell)), repr(pyon_decode(cell)))
+        self.assertEqual(cache.hits + cache.misses, len(cells))
+        self.assertLessEqual(cache.stats()['size'], 3)
+
+    def test_mutable_results_are_copies(self):
+        cache = PyonDecodeCache()
+        cache.decode("{'tags': [1]}")['tags'].append(2)
+        self.assertEqual(cache.decode("{'tags': [1]}"), {'tags': [1]})
+        self.assertIs(cache.decode("(1, 'a')"), cache.decode("(1, 'a')"))
+
+    def test_frozen_results_are_shared_and_immutable(self):
+        cache = PyonDecodeCache(frozen=True)
+        value = cache.decode("{'tags': [1], 's': {2}}")
+        self.assertIs(cache.decode("{'tags': [1], 's': {2}}"), value)
+        self.assertEqual(value['tags'], (1,))
+        self.assertEqual(value['s'], frozenset({2}))
+        with self.assertRaises(TypeError):
+            value['new'] = 1
+
+    def test_bytes_are_utf8_bytes(self):
+        cache = PyonDecodeCache(maxbytes=12)
+        cache.decode("'é'")                         # 3 characters, 4 bytes
+        cache.decode("'日本'")                       # 4 characters, 8 bytes
+        self.assertEqual(cache.stats()['bytes'], 12)
+        cache.decode("'ab'")                        # evicts "'é'"
+        self.assertEqual(cache.stats()['bytes'], 12)
+        self.assertEqual(cache.evictions, 1)
+        cache.decode("'" + 'ü' * 6 + "'")            # 8 characters, 14 bytes: not cached
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_with_pyon_decode_row(self):
+        cache = PyonDecodeCache()
+        rows = [['a', '[1]', '(2,)'], ['b', '[1]', '(2,)']]
+        self.assertEqual([pyon_decode_row(row, cache=cache) for row in rows],
+                         [pyon_decode_row(row) for row in rows])
+        self.assertGreater(cache.hits, 0)
+
+
+class PyonStatsTest(unittest.TestCase):
+
+    def tearDown(self):
+        disable_stats()
+
+    def test_counters(self):
+        stats = enable_stats()
+        pyon_decode("['é', 1]")
+        pyon_decode('[1j]')                              # outside the scanner: literal_eval
+        with self.assertRaises(PyonDecodeError):
+            pyon_decode('[1,,]')
+        text = pyon_encode({'k': 'ü'})
+        pyon_decode_row(['x', '[1]', '[2,,]'])
+        cache = PyonDecodeCache()
+        cache.decode('[1]')
+        cache.decode('[1]')
+        counters = stats.as_dict()
+        self.assertEqual(counters['pyon_decode.calls'], 6)      # 3 direct, 2 cells, 1 cache miss
+        self.assertEqual(counters['pyon_decode.failures'], 2)
+        self.assertEqual(counters['pyon_encode.calls'], 1)
+        self.assertEqual(counters['pyon_encode.bytes'], len(text.encode('utf-8')))
+        self.assertEqual(counters['pyon_decode_row.calls'], 1)
+        self.assertEqual(counters['pyon_decode_row.kept_string'], 1)
+        self.assertEqual(counters['cache.hits'], 1)
+        self.assertEqual(counters['cache.misses'], 1)
+        self.assertGreaterEqual(counters['pyon_decode.literal_eval'], 1)
+        self.assertGreaterEqual(counters['pyon_decode.seconds'], 0.0)
+        stats.reset()
+        self.assertEqual(stats.as_dict(), {})
+
+    def test_bytes_are_utf8(self):
+        stats = enable_stats()
+        pyon_decode("'日本'")
+        pyon_decode(b"'\xc3\xa9'")
+        self.assertEqual(stats.as_dict()['pyon_decode.bytes'], 8 + 4)
+
+    def test_hook_and_timing(self):
+        calls = []
+        stats = enable_stats(PyonStats(hook=lambda *args: calls.append(args), timing=False))
+        pyon_decode('[1]')
+        with self.assertRaises(PyonDecodeError):
+            pyon_decode('[')
+        self.assertEqual([(name, size, seconds) for name, size, seconds, _ in calls],
+                         [('pyon_decode', 3, 0.0), ('pyon_decode', 1, 0.0)])
+        self.assertIsNone(calls[0][3])
+        self.assertIsInstance(calls[1][3], PyonDecodeError)
+        self.assertIs(disable_stats(), stats)
+        pyon_decode('[1]')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(stats.as_dict()['pyon_decode.calls'], 2)
+
+
+class NdpyonIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'records.ndpyon')
+        self.index_path = self.path + '.idx'
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def dump(self, records, mode):
+        with open(self.path, mode, encoding='utf-8', newline='') as fp, \
+                open(self.index_path, mode + 'b') as index_fp:
+            return ndpyon_dump(records, fp, index_fp)
+
+    def test_index_round_trip_with_append(self):
+        first = [{'id': 1, 'name': 'ünï'}, [1, (2, 3)], 'line\nbreak']
+        second = [{'id': 4}, None, {1, 2}]
+        self.assertEqual(self.dump(first, 'w'), len(first))
+        self.assertEqual(self.dump(second, 'a'), len(second))
+        records = first + second
+
+        with open(self.path, 'rb') as fp:
+            self.assertEqual(list(ndpyon_load(fp)), records)
+        with open(self.path, 'rb') as fp, open(self.index_path, 'rb') as index_fp:
+            for n, record in enumerate(records):
+                self.assertEqual(ndpyon_read_record(fp, n, index_fp), record)
+            with self.assertRaises(IndexError):
+                ndpyon_read_record(fp, len(records), index_fp)
+
+        # an index rebuilt from the data file matches the one written while appending
+        rebuilt = io.BytesIO()
+        with open(self.path, 'rb') as fp:
+            self.assertEqual(ndpyon_build_index(fp, rebuilt), len(records))
+        with open(self.index_path, 'rb') as index_fp:
+            self.assertEqual(rebuilt.getvalue(), index_fp.read())
+
+
+class PyonStrToJsonTest(unittest.TestCase):
+    """ pyon_str_to_json(text) must give what pyon_to_json(pyon_decode(text)) gives. """
+
+    EDGE_CASES = [
+        "{1: 'a', True: 'b'}", "{'a': 1, 'a': 2}", "{1: 'a', '1': 'b'}", "{None: 1, 'None': 2}",
+        "{0: 1, -0: 2, 0.0: 3, False: 4}", "{1.0: 1, '1.0': 2}", "{'x': {1: 2}, 'y': {1: 3}}",
+        "[{1: 2}, {1: 3}]", "{'\\x61': 1, 'a': 2}", "{1e0: 1, 1: 2}", "{1: 2,}", "{}",
+        "(1, 2)", "(1)", "{1, 2}", "'a' 'b'", "[True, None, -0, 1.5e3]", "[1e400]", "[0x10]",
+        "[" + "9" * 5000 + "]", "{" + "9" * 5000 + ": 1}", "[" + "9" * 700 + "]", "[1,,2]",
+    ]
+
+    def assert_same(self, text):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            try:
+                expected = 'ok', pyon_to_json(pyon_decode(text))
+            except (ValueError, TypeError):
+                expected = 'error', None
+            try:
+                got = 'ok', pyon_str_to_json(text)
+            except (ValueError, TypeError):
+                got = 'error', None
+        self.assertEqual(got, expected)
+
+    def test_edge_cases(self):
+        for text in self.EDGE_CASES:
+            with self.subTest(text=text):
+                self.assert_same(text)
+
+    def test_randomized_documents(self):
+        rng = random.Random(12)
+        keys = ['1', 'True', '1.0', "'1'", "'a'", '0', '-0', 'False', 'None', "'None'", "'True'", '1e0']
+        for _ in range(1000):
+            items = ', '.join(f'{rng.choice(keys)}: {rng.choice(keys)}' for _ in range(rng.randrange(5)))
+            text = rng.choice(['{%s}', '[{%s}]', "{'k': {%s}}"]) % items
+            with self.subTest(text=text):
+                self.assert_same(text)
+        for _ in range(1000):
+            text = _random_pyon(rng)
+            if text:
+                with self.subTest(text=text):
+                    self.assert_same(text)
+
+
+def _baseline_pyon_to_json(obj):
+    """ pyon_to_json as it was first written: a converted copy, then json.dumps. """
+
+    def convert(value):
+        if isinstance(value, (str, int, float, bool, type(None))):
+            return value
+        elif isinstance(value, dict):
+            return {str(k): convert(v) for k, v in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [convert(v) for v in value]
+        elif isinstance(value, (types.FunctionType, type)):
+            return f"{value.__module__}.{value.__qualname__}"
+        raise TypeError(f"Unsupported type: {type(value)}")
+
+    return json.dumps(convert(obj), separators=(",", ":"))
+
+
+def _random_json_value(rng, depth=0):
+    kind = rng.randrange(7 if depth < 4 else 4)
+    if kind == 0:
+        return rng.choice([0, -1, 10 ** 30, True, False, None, _Size.TWO, _Color.RED, len.__call__.__class__])
+    if kind == 1:
+        return rng.choice([0.0, -0.0, 1.5, 1e-7, 1e300, float('nan'), float('inf'), _random_json_value])
+    if kind == 2:
+        return rng.choice(_WORDS) + rng.choice(_WORDS)
+    if kind == 3:
+        return rng.randint(-10 ** 6, 10 ** 6)
+    n = rng.randrange(4)
+    if kind == 4:
+        return [_random_json_value(rng, depth + 1) for _ in range(n)]
+    if kind == 5:
+        return tuple(_random_json_value(rng, depth + 1) for _ in range(n))
+    keys = [rng.choice(_WORDS), 1, '1', True, 'True', None, 2.5, _Size.TWO, (1, 2)]
+    return {rng.choice(keys): _random_json_value(rng, depth + 1) for _ in range(n)}
+
+
+class PyonJsonEncoderTest(unittest.TestCase):
+
+    def test_matches_baseline(self):
+        rng = random.Random(14)
+        encoder = PyonJsonEncoder()
+        for _ in range(2000):
+            obj = _random_json_value(rng)
+            with self.subTest(obj=obj):
+                self.assertEqual(encoder.encode(obj), _baseline_pyon_to_json(obj))
+                self.assertEqual(pyon_to_json(obj), _baseline_pyon_to_json(obj))
+        obj = collections.OrderedDict([('b', [1]), ('a', (2,))])
+        self.assertEqual(encoder.encode(obj), _baseline_pyon_to_json(obj))
+
+    def test_errors(self):
+        encoder = PyonJsonEncoder()
+        for obj in (b'x', [1j], {'a': object()}):
+            with self.subTest(obj=obj):
+                with self.assertRaises(TypeError):
+                    encoder.encode(obj)
+        a = [1]
+        a.append(a)
+        with self.assertRaises(ValueError):
+            encoder.encode(a)
+
+    def test_registered_handlers(self):
+        class Point:
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+
+        class Point3(Point):
+            pass
+
+        encoder = PyonJsonEncoder({Point: lambda p: {'x': p.x, 'y': p.y}})
+        self.assertEqual(encoder.encode([Point(1, 2), Point3(3, (4,))]), '[{"x":1,"y":2},{"x":3,"y":[4]}]')
+        encoder.register(bytes, lambda b: b.hex())
+        self.assertEqual(encoder.encode({'k': [b'\x01', 'ab']}), '{"k":["01","ab"]}')
+
+
+class PyonToJsonSetsTest(unittest.TestCase):
+
+    @staticmethod
+    def as_lists(obj, order):
+        """ obj with every set replaced by a list of its items, in the given order. """
+        if isinstance(obj, (set, frozenset)):
+            return [PyonToJsonSetsTest.as_lists(v, order) for v in order(obj)]
+        if isinstance(obj, dict):
+            return {k: PyonToJsonSetsTest.as_lists(v, order) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [PyonToJsonSetsTest.as_lists(v, order) for v in obj]
+        return obj
+
+    def test_sets_become_arrays(self):
+        values = [{3, 1, 2}, frozenset({'b', 'a'}), {'k': [{(1, 2), (0, 5)}]}, set(), {10 ** 30, -1.5, 0}]
+        for obj in values:
+            with self.subTest(obj=obj):
+                self.assertEqual(pyon_to_json(obj), _baseline_pyon_to_json(self.as_lists(obj, list)))
+                self.assertEqual(pyon_to_json(obj, set_order='sorted'),
+                                 _baseline_pyon_to_json(self.as_lists(obj, sorted)))
+        for text in ('{3, 1, 2}', "{'k': [{(1, 2), (0, 5)}]}", '[{1.5, 0}, set()]', "{'b', 'a', 'c'}"):
+            for set_order in ('iterated', 'sorted'):
+                with self.subTest(text=text, set_order=set_order):
+                    self.assertEqual(pyon_str_to_json(text, set_order=set_order),
+                                     pyon_to_json(pyon_decode(text), set_order=set_order))
+
+    def test_sorted_order_is_deterministic_for_mixed_sets(self):
+        a = {None, 'b', 2, (1,), 'a', 1.5, True, frozenset({1})}
+        b = set(reversed(list(a)))
+        self.assertEqual(pyon_to_json(a, set_order='sorted'), pyon_to_json(b, set_order='sorted'))
+        self.assertEqual(pyon_to_json(a, set_order='sorted'), '[null,true,1.5,2,"a","b",[1],[1]]')
+
+    def test_bad_set_order(self):
+        with self.assertRaises(ValueError):
+            pyon_to_json({1}, set_order='insertion')
+        with self.assertRaises(ValueError):
+            PyonJsonEncoder(set_order='random')
+
+
+class JsonToPyonTest(unittest.TestCase):
+
+    def test_rejects_non_finite_numbers(self):
+        for text in ('[1e400]', '-1e400', 'NaN', '[Infinity]', '-Infinity'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    json_to_pyon(text)
+
+    def test_converts(self):
+        self.assertEqual(pyon_decode(json_to_pyon('{"a": [1, 2.5, true, null, "x"]}')),
+                         {'a': [1, 2.5, True, None, 'x']})
+
+
+
+class _Color(str, enum.Enum):
+    RED = 'red'
+
+
+class _Size(enum.IntEnum):
+    TWO = 2
+
+
+class SortDictKeysTest(unittest.TestCase):
+
+    def test_matches_sorted_where_sorted_works(self):
+        for keys in (['zeta', _Color.RED, 'alpha'], [3, _Size.TWO, 1], [2.5, 1, -3.0],
+                     [(2, 1), collections.namedtuple('P', 'x y')(1, 2), (1, 3)], [b'b', b'a']):
+            with self.subTest(keys=keys):
+                obj = {k: i for i, k in enumerate(keys)}
+                self.assertEqual(list(sort_dict_keys(obj)), sorted(keys))
+                self.assertEqual(list(sort_dict_keys(dict(obj), in_place=True)), sorted(keys))
+
+    def test_mixed_key_types(self):
+        obj = {(1, 2): 'c', 'set': 'b', 1: 'a', None: 'z', b'x': 'd'}
+        self.assertEqual(list(sort_dict_keys(obj)), [None, 1, 'set', b'x', (1, 2)])
+
+    def test_deep_nesting_and_in_place(self):
+        obj = inner = {}
+        for _ in range(sys.getrecursionlimit() * 2):
+            inner['b'] = 1
+            inner['a'] = inner = {}
+        self.assertEqual(list(sort_dict_keys(obj)), ['a', 'b'])
+        self.assertIs(sort_dict_keys(obj, in_place=True), obj)
+        self.assertEqual(list(obj), ['a', 'b'])
+
+
+
+class IterencodeTest(unittest.TestCase):
+    """ Joined iterencode chunks, and pyon_dump output, must equal pyon_encode with the same options. """
+
+    OPTIONS = [{}, {'compact': True}, {'sort_keys': True}, {'canonical': True, 'compact': True}]
+
+    def test_randomized_values(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            obj = _random_value(rng)
+            for options in self.OPTIONS:
+                with self.subTest(obj=obj, options=options):
+                    expected = pyon_encode(obj, **options)
+                    for chunk_size in (1, 3, 4096):
+                        self.assertEqual(''.join(iterencode(obj, chunk_size=chunk_size, **options)), expected)
+                    fp = io.StringIO()
+                    pyon_dump(obj, fp, chunk_size=2, **options)
+                    self.assertEqual(fp.getvalue(), expected)
+
+    def test_recursive_containers(self):
+        a = [1, 2]
+        a.append(a)
+        d = {'a': 1}
+        d['d'] = d
+        for obj in (a, d, [a, d]):
+            self.assertEqual(''.join(iterencode(obj, chunk_size=1)), repr(obj))
+
+    def test_chunks_are_bounded(self):
+        chunks = list(iterencode(list(range(10000)), chunk_size=10))
+        self.assertGreater(len(chunks), 1000)
+        self.assertLessEqual(max(map(len, chunks)), 10 * len(', 9999'))
+
+
+class PyonEncodeSortedTest(unittest.TestCase):
+
+    def test_sort_keys_matches_sort_dict_keys(self):
+        rng = random.Random(17)
+        for _ in range(300):
+            obj = _random_value(rng)
+            with self.subTest(obj=obj):
+                self.assertEqual(pyon_encode(obj, sort_keys=True), repr(sort_dict_keys(obj)))
+                self.assertEqual(pyon_encode(obj, sort_keys=True, compact=True),
+                                 pyon_encode(sort_dict_keys(obj), compact=True))
+
+    def test_canonical_ignores_set_iteration_order(self):
+        a = {'k': {1, 9}, 'f': frozenset({9, 1})}
+        b = {'f': frozenset({1, 9}), 'k': {9, 1}}
+        self.assertNotEqual(list(a['k']), list(b['k']))
+        for options in ({}, {'compact': True}, {'indent': 1}, {'indent': 2, 'width': 5}):
+            with self.subTest(options=options):
+                self.assertEqual(pyon_encode(a, canonical=True, **options),
+                                 pyon_encode(b, canonical=True, **options))
+
+    def test_indent_with_sort_keys(self):
+        obj = {'b': [1, 2], 1: 'x', None: {'z': 1, 'a': 2}, (1,): 3}
+        self.assertEqual(pyon_encode(obj, indent=1, sort_keys=True),
+                         pprint.pformat(sort_dict_keys(obj), sort_dicts=False))
+        self.assertEqual(pyon_encode(obj, indent=1, width=10, sort_keys=True),
+                         pprint.pformat(sort_dict_keys(obj), width=10, sort_dicts=False))
+        with self.assertRaises(ValueError):
+            pyon_encode([collections.OrderedDict(a=1)], indent=1, sort_keys=True)
+
+
+class NormalizePyonManyTest(unittest.TestCase):
+
+    COLUMN = ["{'b': 1, 'a': [2]}", '{"a":[2],"b":1}', '(1,2)', "{'b': 1, 'a': [2]}", '{3, 1}', '(1,2)'] * 20
+
+    def test_matches_normalize_pyon_in_order(self):
+        expected = [normalize_pyon(text) for text in self.COLUMN]
+        self.assertEqual(normalize_pyon_many(self.COLUMN), expected)
+        self.assertEqual(normalize_pyon_many(iter(self.COLUMN)), expected)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(normalize_pyon_many(self.COLUMN, chunk_size=2, executor=executor), expected)
+        self.assertEqual(normalize_pyon_many(self.COLUMN, chunk_size=2, max_workers=2), expected)
+        self.assertEqual(normalize_pyon_many([]), [])
+
+    def test_each_distinct_string_decoded_once(self):
+        stats = enable_stats()
+        try:
+            normalize_pyon_many(self.COLUMN)
+        finally:
+            disable_stats()
+        self.assertEqual(stats.as_dict()['pyon_decode.calls'], len(set(self.COLUMN)))
+
+    def test_invalid_strings_kept(self):
+        self.assertEqual(normalize_pyon_many(['[1,2]', '[1,,]', 'x', '[1,,]']), ['[1, 2]', '[1,,]', 'x', '[1,,]'])
+
+
+class PyonHashTest(unittest.TestCase):
+
+    def test_digest_of_canonical_text(self):
+        self.assertEqual(pyon_hash({'b': {2, 1}, 'a': (1.5, None)}),
+                         hashlib.sha256(b"{'a': (1.5, None), 'b': {1, 2}}").hexdigest())
+        rng = random.Random(18)
+        for _ in range(300):
+            obj = _random_value(rng)
+            with self.subTest(obj=obj):
+                text = pyon_encode(obj, canonical=True).encode('utf-8', 'surrogatepass')
+                self.assertEqual(pyon_hash(obj), hashlib.sha256(text).hexdigest())
+                self.assertEqual(pyon_hash(obj, 'md5'), hashlib.md5(text).hexdigest())
+
+    def test_order_and_spelling_do_not_matter(self):
+        self.assertEqual(pyon_hash({'a': 1, 'b': {1, 9}}), pyon_hash({'b': {9, 1}, 'a': 1}))
+        self.assertEqual(pyon_hash_str("{'b': {9, 1}, 'a': 1}"), pyon_hash_str('{"a":1,"b":{1,9}}  # c'))
+        self.assertEqual(pyon_hash_str("{'a': [1, 'x']}"), pyon_hash({'a': [1, 'x']}))
+        self.assertNotEqual(pyon_hash(1), pyon_hash(1.0))
+
+    def test_stable_across_processes(self):
+        obj = {'set': {'a', 'b', 'c', 'd'}, 'fs': [frozenset({'x', 'y'})]}
+        code = ("import sys; sys.path.insert(0, sys.argv[1]); from pyontools import pyon_hash; "
+                "print(pyon_hash({'set': {'a', 'b', 'c', 'd'}, 'fs': [frozenset({'x', 'y'})]}))")
+        here = os.path.dirname(os.path.abspath(__file__))
+        for seed in ('1', '2'):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            out = subprocess.run([sys.executable, '-c', code, here], env=env, capture_output=True,
+                                 text=True, check=True).stdout.strip()
+            self.assertEqual(out, pyon_hash(obj))
+
+
+class PyonEncodeIndentTest(unittest.TestCase):
+    """ pyon_encode(obj, indent=i, width=w) must give pprint.pformat(obj, indent=i, width=w). """
+
+    MIXED = [
+        {'a': 1, b'b': 2}, {1: 'x', 'a': 2, None: 3, (1,): 4}, {1, 'a', (1,), b'z', None},
+        frozenset({2.5, 'b', b'a'}), [{'k': {'a', b'b', 1}}, ('long text ' * 8, b'\x00' * 30)],
+    ]
+
+    def assert_same(self, obj):
+        for indent in (1, 4):
+            for width in (1, 20, 80):
+                self.assertEqual(pyon_encode(obj, indent=indent, width=width),
+                                 pprint.pformat(obj, indent=indent, width=width))
+
+    def test_mixed_types(self):
+        for obj in self.MIXED:
+            with self.subTest(obj=obj):
+                self.assert_same(obj)
+
+    def test_randomized_values(self):
+        rng = random.Random(25)
+        for _ in range(300):
+            obj = _random_value(rng)
+            with self.subTest(obj=obj):
+                self.assert_same(obj)
+
+    def test_long_strings_not_decoded_again(self):
+        stats = enable_stats()
+        try:
+            pyon_encode({'a': 'several words ' * 10, 'b': b'bytes' * 20}, indent=1, width=20)
+        finally:
+            disable_stats()
+        self.assertNotIn('pyon_decode.calls', stats.as_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()